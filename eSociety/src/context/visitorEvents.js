@@ -0,0 +1,51 @@
+// src/context/visitorEvents.js
+import axios from 'axios';
+
+const RECONNECT_DELAY_MS = 3000;
+
+// Opens the visitor event stream with a short-lived ticket, so the bearer token never goes in a URL.
+// A ticket is single-use in practice: on any error the stream is reopened with a fresh one, and
+// onResync runs so the caller can refetch whatever it missed while disconnected.
+export const openVisitorEvents = (token, { onEvent, onResync }) => {
+  let source = null;
+  let timer = null;
+  let closed = false;
+  let connectedBefore = false;
+
+  const connect = async () => {
+    try {
+      const response = await axios.post(
+        'http://localhost:8000/api/visitors/events/ticket',
+        {},
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      if (closed) return;
+      source = new EventSource(
+        `http://localhost:8000/api/visitors/events?ticket=${encodeURIComponent(response.data.ticket)}`
+      );
+      source.onopen = () => {
+        if (connectedBefore && onResync) onResync();
+        connectedBefore = true;
+      };
+      source.onmessage = (e) => onEvent(JSON.parse(e.data));
+      source.onerror = () => {
+        // The browser would retry with the same, soon expired, ticket
+        source.close();
+        retry();
+      };
+    } catch (err) {
+      retry();
+    }
+  };
+
+  const retry = () => {
+    if (!closed) timer = setTimeout(connect, RECONNECT_DELAY_MS);
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    if (source) source.close();
+  };
+};
@@ -6,21 +6,25 @@ import { AuthContext } from '../context/AuthContext';
 const AdminBookings = () => {
   const { user } = useContext(AuthContext);
   const [bookings, setBookings] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
 
+  const fetchBookings = async (after = null) => {
+    try {
+      const response = await axios.get('http://localhost:8000/api/admin/bookings', {
+        headers: { Authorization: `Bearer ${user.token}` },
+        params: { after: after || undefined },
+      });
+      setBookings((prev) => (after ? [...prev, ...response.data.items] : response.data.items));
+      setNextCursor(response.data.next_cursor);
+      setLoading(false);
+    } catch (error) {
+      console.error('Error fetching bookings:', error);
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchBookings = async () => {
-      try {
-        const response = await axios.get('http://localhost:8000/api/admin/bookings', {
-          headers: { Authorization: `Bearer ${user.token}` },
-        });
-        setBookings(response.data);
-        setLoading(false);
-      } catch (error) {
-        console.error('Error fetching bookings:', error);
-        setLoading(false);
-      }
-    };
     if (user) {
       fetchBookings();
     }
@@ -58,6 +62,7 @@ const AdminBookings = () => {
             >
               <div>
                 <strong>{booking.facility_name}</strong> - {booking.slot}
+                {booking.booking_date && <> on {booking.booking_date}</>}
                 <br />
                 <small className="text-muted">Booked on: {booking.booked_at}</small>
               </div>
@@ -71,6 +76,13 @@ const AdminBookings = () => {
           ))}
         </ul>
       )}
+      {nextCursor && (
+        <div className="text-center mt-3">
+          <button className="btn btn-outline-secondary" onClick={() => fetchBookings(nextCursor)}>
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   );
 };
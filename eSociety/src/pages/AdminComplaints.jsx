@@ -7,6 +7,8 @@ import { useNavigate } from 'react-router-dom';
 const AdminComplaints = () => {
   const { user } = useContext(AuthContext);
   const [complaints, setComplaints] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [statusFilter, setStatusFilter] = useState('');
   const [error, setError] = useState('');
   const navigate = useNavigate();
 
@@ -16,14 +18,16 @@ const AdminComplaints = () => {
       return;
     }
     fetchComplaints();
-  }, [user, navigate]);
+  }, [user, navigate, statusFilter]);
 
-  const fetchComplaints = async () => {
+  const fetchComplaints = async (after = null) => {
     try {
       const response = await axios.get('http://localhost:8000/api/admin/complaints', {
         headers: { Authorization: `Bearer ${user.token}` },
+        params: { status: statusFilter || undefined, after: after || undefined },
       });
-      setComplaints(response.data);
+      setComplaints((prev) => (after ? [...prev, ...response.data.items] : response.data.items));
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to fetch complaints');
     }
@@ -47,7 +51,18 @@ const AdminComplaints = () => {
       <h2 className="mb-4">Manage Complaints</h2>
       {error && <div className="alert alert-danger">{error}</div>}
 
-      <h3>All Complaints</h3>
+      <div className="d-flex justify-content-between align-items-center mb-3">
+        <h3>All Complaints</h3>
+        <select
+          className="form-select w-auto"
+          value={statusFilter}
+          onChange={(e) => setStatusFilter(e.target.value)}
+        >
+          <option value="">All statuses</option>
+          <option value="pending">Pending</option>
+          <option value="resolved">Resolved</option>
+        </select>
+      </div>
       <div className="list-group">
         {complaints.map((complaint) => (
           <div key={complaint._id} className="list-group-item d-flex justify-content-between align-items-center">
@@ -69,6 +84,11 @@ const AdminComplaints = () => {
           </div>
         ))}
       </div>
+      {nextCursor && (
+        <button className="btn btn-outline-secondary mt-3" onClick={() => fetchComplaints(nextCursor)}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };
@@ -16,21 +16,14 @@ const AdminDashboard = () => {
   useEffect(() => {
     const fetchStats = async () => {
       try {
-        const [complaintsRes, bookingsRes, visitorsRes] = await Promise.all([
-          axios.get('http://localhost:8000/api/admin/complaints', {
-            headers: { Authorization: `Bearer ${user.token}` },
-          }),
-          axios.get('http://localhost:8000/api/admin/bookings', {
-            headers: { Authorization: `Bearer ${user.token}` },
-          }),
-          axios.get('http://localhost:8000/api/admin/visitors', {
-            headers: { Authorization: `Bearer ${user.token}` },
-          }),
-        ]);
+        const response = await axios.get('http://localhost:8000/api/admin/stats', {
+          headers: { Authorization: `Bearer ${user.token}` },
+        });
+        const { complaints, bookings, visitors } = response.data;
         setStats({
-          complaints: complaintsRes.data.length,
-          bookings: bookingsRes.data.length,
-          pendingVisitors: visitorsRes.data.filter((v) => v.status === 'pending').length,
+          complaints: complaints.total,
+          bookings: bookings.total,
+          pendingVisitors: visitors.by_status.pending || 0,
         });
         setLoading(false);
       } catch (error) {
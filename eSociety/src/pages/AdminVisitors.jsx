@@ -7,6 +7,8 @@ import { useNavigate } from 'react-router-dom';
 const AdminVisitors = () => {
   const { user } = useContext(AuthContext);
   const [visitors, setVisitors] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [statusFilter, setStatusFilter] = useState('');
   const [error, setError] = useState('');
   const navigate = useNavigate();
 
@@ -16,14 +18,16 @@ const AdminVisitors = () => {
       return;
     }
     fetchVisitors();
-  }, [user, navigate]);
+  }, [user, navigate, statusFilter]);
 
-  const fetchVisitors = async () => {
+  const fetchVisitors = async (after = null) => {
     try {
       const response = await axios.get('http://localhost:8000/api/admin/visitors', {
         headers: { Authorization: `Bearer ${user.token}` },
+        params: { status: statusFilter || undefined, after: after || undefined },
       });
-      setVisitors(response.data);
+      setVisitors((prev) => (after ? [...prev, ...response.data.items] : response.data.items));
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to fetch visitors');
     }
@@ -47,13 +51,28 @@ const AdminVisitors = () => {
       <h2 className="mb-4">Manage Visitors (Admin)</h2>
       {error && <div className="alert alert-danger">{error}</div>}
 
-      <h3>All Visitors</h3>
+      <div className="d-flex justify-content-between align-items-center mb-3">
+        <h3>All Visitors</h3>
+        <select
+          className="form-select w-auto"
+          value={statusFilter}
+          onChange={(e) => setStatusFilter(e.target.value)}
+        >
+          <option value="">All statuses</option>
+          <option value="pending">Pending</option>
+          <option value="approve">Approved</option>
+          <option value="deny">Denied</option>
+          <option value="entered">Entered</option>
+          <option value="exited">Exited</option>
+        </select>
+      </div>
       <div className="list-group">
         {visitors.map((visitor) => (
           <div key={visitor._id} className="list-group-item d-flex justify-content-between align-items-center">
             <div>
               <strong>{visitor.name}</strong>
               <p>Purpose: {visitor.purpose}</p>
+              {visitor.flat && <p>Flat: {visitor.flat}</p>}
               <p>Status: {visitor.status}</p>
               <p>Created on: {new Date(visitor.created_at).toLocaleDateString()}</p>
             </div>
@@ -76,6 +95,11 @@ const AdminVisitors = () => {
           </div>
         ))}
       </div>
+      {nextCursor && (
+        <button className="btn btn-outline-secondary mt-3" onClick={() => fetchVisitors(nextCursor)}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };
@@ -8,7 +8,9 @@ const ResidentBookings = () => {
   const { user } = useContext(AuthContext);
   const [facilities, setFacilities] = useState([]);
   const [bookings, setBookings] = useState([]);
-  const [newBooking, setNewBooking] = useState({ facility_id: '', slot: '' });
+  const today = new Date().toISOString().split('T')[0];
+  const [newBooking, setNewBooking] = useState({ facility_id: '', slot: '', booking_date: today });
+  const [availableSlots, setAvailableSlots] = useState([]);
   const [error, setError] = useState('');
   const navigate = useNavigate();
 
@@ -21,10 +23,20 @@ const ResidentBookings = () => {
     fetchBookings();
   }, [user, navigate]);
 
+  useEffect(() => {
+    if (newBooking.facility_id) {
+      fetchAvailability(newBooking.facility_id, newBooking.booking_date);
+    } else {
+      setAvailableSlots([]);
+    }
+  }, [newBooking.facility_id, newBooking.booking_date]);
+
   const fetchFacilities = async () => {
     try {
       console.log('Fetching facilities');
-      const response = await axios.get('http://localhost:8000/api/facilities');
+      const response = await axios.get('http://localhost:8000/api/facilities', {
+        headers: { Authorization: `Bearer ${user.token}` },
+      });
       console.log('Facilities fetched:', response.data);
       setFacilities(response.data);
     } catch (err) {
@@ -33,6 +45,19 @@ const ResidentBookings = () => {
     }
   };
 
+  const fetchAvailability = async (facilityId, bookingDate) => {
+    try {
+      const response = await axios.get(`http://localhost:8000/api/facilities/${facilityId}/availability`, {
+        params: { booking_date: bookingDate },
+        headers: { Authorization: `Bearer ${user.token}` },
+      });
+      setAvailableSlots(response.data.available_slots);
+    } catch (err) {
+      console.error('Error fetching availability:', err);
+      setError('Failed to fetch available slots');
+    }
+  };
+
   const fetchBookings = async () => {
     try {
       console.log('Fetching bookings for user:', user._id);
@@ -54,7 +79,11 @@ const ResidentBookings = () => {
         setError('Please select a facility and a slot');
         return;
       }
-      const payload = { facility_id: newBooking.facility_id, slot: newBooking.slot };
+      const payload = {
+        facility_id: newBooking.facility_id,
+        slot: newBooking.slot,
+        booking_date: newBooking.booking_date,
+      };
       console.log('Creating booking:', payload);
       const response = await axios.post(
         'http://localhost:8000/api/bookings',
@@ -62,8 +91,7 @@ const ResidentBookings = () => {
         { headers: { Authorization: `Bearer ${user.token}` } }
       );
       console.log('Booking created:', response.data);
-      setNewBooking({ facility_id: '', slot: '' });
-      fetchFacilities();
+      setNewBooking({ facility_id: '', slot: '', booking_date: today });
       fetchBookings();
       setError(''); // Clear any previous errors
     } catch (err) {
@@ -91,7 +119,7 @@ const ResidentBookings = () => {
             id="facility"
             className="form-control"
             value={newBooking.facility_id}
-            onChange={(e) => setNewBooking({ ...newBooking, facility_id: e.target.value })}
+            onChange={(e) => setNewBooking({ ...newBooking, facility_id: e.target.value, slot: '' })}
             required
           >
             <option value="">Select a facility</option>
@@ -102,6 +130,18 @@ const ResidentBookings = () => {
             ))}
           </select>
         </div>
+        <div className="mb-3">
+          <label htmlFor="bookingDate" className="form-label">Date</label>
+          <input
+            type="date"
+            id="bookingDate"
+            className="form-control"
+            min={today}
+            value={newBooking.booking_date}
+            onChange={(e) => setNewBooking({ ...newBooking, booking_date: e.target.value, slot: '' })}
+            required
+          />
+        </div>
         <div className="mb-3">
           <label htmlFor="slot" className="form-label">Available Slot</label>
           <select
@@ -112,14 +152,11 @@ const ResidentBookings = () => {
             required
           >
             <option value="">Select a slot</option>
-            {newBooking.facility_id &&
-              facilities
-                .find((f) => f._id === newBooking.facility_id)
-                ?.available_slots.map((slot) => (
-                  <option key={slot} value={slot}>
-                    {slot}
-                  </option>
-                ))}
+            {availableSlots.map((slot) => (
+              <option key={slot} value={slot}>
+                {slot}
+              </option>
+            ))}
           </select>
         </div>
         <button type="submit" className="btn btn-primary">Book</button>
@@ -131,6 +168,7 @@ const ResidentBookings = () => {
           <div key={booking._id} className="list-group-item">
             <strong>{booking.facility_name}</strong>
             <p>Slot: {booking.slot}</p>
+            {booking.booking_date && <p>Date: {booking.booking_date}</p>}
             <p>Booked on: {booking.booked_at}</p>
           </div>
         ))}
@@ -2,6 +2,7 @@
 import React, { useState, useEffect, useContext } from 'react';
 import axios from 'axios';
 import { AuthContext } from '../context/AuthContext';
+import { openVisitorEvents } from '../context/visitorEvents';
 import { useNavigate } from 'react-router-dom';
 
 const ResidentVisitors = () => {
@@ -18,6 +19,21 @@ const ResidentVisitors = () => {
     fetchVisitors();
   }, [user, navigate]);
 
+  useEffect(() => {
+    if (!user || user.role !== 'resident') return undefined;
+    // Live visitor updates replace reloading the pending list
+    return openVisitorEvents(user.token, {
+      onEvent: ({ type, visitor }) => {
+        if (type === 'visitor.created') {
+          setVisitors((prev) => [visitor, ...prev.filter((v) => v._id !== visitor._id)]);
+        } else {
+          setVisitors((prev) => prev.filter((v) => v._id !== visitor._id));
+        }
+      },
+      onResync: () => fetchVisitors(),
+    });
+  }, [user]);
+
   const fetchVisitors = async () => {
     try {
       const response = await axios.get('http://localhost:8000/api/visitors/pending', {
@@ -2,13 +2,16 @@
 import React, { useState, useEffect, useContext } from 'react';
 import axios from 'axios';
 import { AuthContext } from '../context/AuthContext';
+import { openVisitorEvents } from '../context/visitorEvents';
 import { useNavigate } from 'react-router-dom';
 
 const SecurityDashboard = () => {
   const { user } = useContext(AuthContext);
-  const [visitors, setVisitors] = useState([]);
+  // A count at the page limit is a lower bound, shown with a "+"
+  const [pendingVisitors, setPendingVisitors] = useState({ count: 0, capped: false });
+  const [recentEntries, setRecentEntries] = useState([]);
   const [error, setError] = useState('');
-  const [newVisitor, setNewVisitor] = useState({ name: '', purpose: '' });
+  const [newVisitor, setNewVisitor] = useState({ name: '', purpose: '', flat: '' });
   const [formError, setFormError] = useState('');
   const [successMessage, setSuccessMessage] = useState('');
   const navigate = useNavigate();
@@ -21,12 +24,40 @@ const SecurityDashboard = () => {
     fetchVisitors();
   }, [user, navigate]);
 
+  useEffect(() => {
+    if (!user || user.role !== 'security') return undefined;
+    // Apply each visitor change to the counters locally; only a reconnect refetches
+    return openVisitorEvents(user.token, {
+      onEvent: ({ type, visitor }) => {
+        if (type === 'visitor.created') {
+          setPendingVisitors((prev) => ({ ...prev, count: prev.count + 1 }));
+        } else if (type === 'visitor.approved' || type === 'visitor.denied') {
+          setPendingVisitors((prev) => ({ ...prev, count: Math.max(prev.count - 1, 0) }));
+        } else if (type === 'visitor.entered') {
+          setRecentEntries((prev) => [visitor, ...prev.filter((v) => v._id !== visitor._id)].slice(0, 5));
+        } else if (type === 'visitor.exited') {
+          setRecentEntries((prev) => prev.filter((v) => v._id !== visitor._id));
+        }
+      },
+      onResync: () => fetchVisitors(),
+    });
+  }, [user]);
+
   const fetchVisitors = async () => {
     try {
-      const response = await axios.get('http://localhost:8000/api/security/visitors', {
-        headers: { Authorization: `Bearer ${user.token}` },
-      });
-      setVisitors(response.data);
+      const headers = { Authorization: `Bearer ${user.token}` };
+      const [pendingRes, enteredRes] = await Promise.all([
+        axios.get('http://localhost:8000/api/security/visitors', {
+          headers,
+          params: { status: 'pending', limit: 200 },
+        }),
+        axios.get('http://localhost:8000/api/security/visitors', {
+          headers,
+          params: { status: 'entered', limit: 5 },
+        }),
+      ]);
+      setPendingVisitors({ count: pendingRes.data.items.length, capped: Boolean(pendingRes.data.next_cursor) });
+      setRecentEntries(enteredRes.data.items);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to fetch visitors');
     }
@@ -41,8 +72,8 @@ const SecurityDashboard = () => {
 
   const handleAddVisitor = async (e) => {
     e.preventDefault();
-    if (!newVisitor.name || !newVisitor.purpose) {
-      setFormError('Both name and purpose are required.');
+    if (!newVisitor.name || !newVisitor.purpose || !newVisitor.flat) {
+      setFormError('Name, purpose and flat are required.');
       return;
     }
 
@@ -52,20 +83,17 @@ const SecurityDashboard = () => {
         {
           name: newVisitor.name,
           purpose: newVisitor.purpose,
+          flat: newVisitor.flat,
         },
         { headers: { Authorization: `Bearer ${user.token}` } }
       );
-      setNewVisitor({ name: '', purpose: '' });
+      setNewVisitor({ name: '', purpose: '', flat: '' });
       setSuccessMessage('Visitor added successfully!');
-      fetchVisitors();
     } catch (err) {
       setFormError(err.response?.data?.detail || 'Failed to add visitor');
     }
   };
 
-  const pendingVisitors = visitors.filter((v) => v.status === 'pending').length;
-  const recentEntries = visitors.filter((v) => v.status === 'entered').slice(0, 5);
-
   return (
     <div className="d-flex" style={{ minHeight: '100vh' }}>
       <div className="bg-dark" style={{ width: '250px', padding: '20px', position: 'fixed', height: '100vh', overflowY: 'auto' }}>
@@ -93,7 +121,7 @@ const SecurityDashboard = () => {
             <div className="card">
               <div className="card-body">
                 <h5 className="card-title">Pending Visitors</h5>
-                <p className="card-text display-4">{pendingVisitors}</p>
+                <p className="card-text display-4">{pendingVisitors.count}{pendingVisitors.capped && '+'}</p>
               </div>
             </div>
           </div>
@@ -129,6 +157,20 @@ const SecurityDashboard = () => {
                   required
                 />
               </div>
+              <div className="mb-3">
+                <label htmlFor="visitorFlat" className="form-label">
+                  Flat / Address
+                </label>
+                <input
+                  type="text"
+                  id="visitorFlat"
+                  name="flat"
+                  className="form-control"
+                  value={newVisitor.flat}
+                  onChange={handleInputChange}
+                  required
+                />
+              </div>
               <div className="mb-3">
                 <label htmlFor="visitorPurpose" className="form-label">
                   Purpose of Visit
@@ -160,6 +202,7 @@ const SecurityDashboard = () => {
                   <div key={visitor._id} className="list-group-item">
                     <strong>{visitor.name}</strong>
                     <p>Purpose: {visitor.purpose}</p>
+                    {visitor.flat && <p>Flat: {visitor.flat}</p>}
                     <p>Status: {visitor.status}</p>
                     <p>
                       Last Updated:{' '}
@@ -6,7 +6,8 @@ import { useNavigate } from 'react-router-dom';
 
 const SecurityDashboard = () => {
   const { user } = useContext(AuthContext);
-  const [visitors, setVisitors] = useState([]);
+  const [pendingVisitors, setPendingVisitors] = useState(0);
+  const [recentEntries, setRecentEntries] = useState([]);
   const [error, setError] = useState('');
   const navigate = useNavigate();
 
@@ -20,18 +21,25 @@ const SecurityDashboard = () => {
 
   const fetchVisitors = async () => {
     try {
-      const response = await axios.get('http://localhost:8000/api/security/visitors', {
-        headers: { Authorization: `Bearer ${user.token}` },
-      });
-      setVisitors(response.data);
+      const headers = { Authorization: `Bearer ${user.token}` };
+      const [pendingRes, enteredRes] = await Promise.all([
+        axios.get('http://localhost:8000/api/security/visitors', {
+          headers,
+          params: { status: 'pending', limit: 200 },
+        }),
+        axios.get('http://localhost:8000/api/security/visitors', {
+          headers,
+          params: { status: 'entered', limit: 5 },
+        }),
+      ]);
+      const pending = pendingRes.data.items.length;
+      setPendingVisitors(pendingRes.data.next_cursor ? `${pending}+` : pending);
+      setRecentEntries(enteredRes.data.items);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to fetch visitors');
     }
   };
 
-  const pendingVisitors = visitors.filter(v => v.status === 'pending').length;
-  const recentEntries = visitors.filter(v => v.status === 'entered').slice(0, 5);
-
   return (
     <div className="container py-5">
       <h2 className="mb-4">Security Dashboard</h2>
@@ -0,0 +1,799 @@
+# benchmark.py
+# Load-test harness for the API. Seeds a benchmark database with realistic volumes, drives
+# scripted resident/admin/security traffic through the ASGI app in-process and reports
+# throughput, latency percentiles and Mongo commands per request.
+#
+# Needs a local mongod (--uri, default MONGO_URI or mongodb://localhost:27017). The database named
+# by --db (default esociety_bench) is dropped and reseeded on every run; the app's own
+# MONGO_DB_NAME is ignored, and names without a "_bench" suffix are refused.
+#
+# Usage:
+#   python benchmark.py --duration 30 --concurrency 50 --mix mixed --output results.json
+#   python benchmark.py --output new.json --compare results.json
+#   python benchmark.py --scenario concurrency --levels 10,50,100,200   # async vs blocking driver
+#   python benchmark.py --scenario login-storm --logins 500 --concurrency 50 --bystanders 10
+#   python benchmark.py --scenario booking-contention --concurrency 50 --rounds 50
+#   python benchmark.py --scenario pending-growth --history 1000,10000,100000
+#   python benchmark.py --scenario search --search-docs 500000
+#   python benchmark.py --scenario import --import-rows 100,1000,5000
+#   python benchmark.py --scenario encode --sizes 10000,100000   # no mongod needed
+#   python benchmark.py --scenario logging   # request logging overhead only; no mongod needed
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from pymongo import MongoClient
+
+SLOTS = [f"{hour:02d}:00-{hour + 1:02d}:00" for hour in range(6, 22)]
+WORDS = [
+    "water", "leak", "lift", "parking", "noise", "garbage", "light", "gate", "pipe", "power",
+    "delivery", "courier", "plumber", "electrician", "guest", "cab", "maid", "repair", "party", "gym",
+]
+MIXES = {
+    "resident": {"resident": 1.0},
+    "admin": {"admin": 1.0},
+    "security": {"security": 1.0},
+    "mixed": {"resident": 0.7, "security": 0.2, "admin": 0.1},
+}
+SEED_CHUNK = 5000
+BENCH_PASSWORD = "benchmark123"
+BENCH_DB_SUFFIX = "_bench"
+
+main = None  # The app module, imported by load_app() once the target database is pinned
+
+# httpx logs every request at INFO, which would swamp the report
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def load_app(uri, db_name):
+    """Import the app against db_name, which must be a throwaway benchmark database."""
+    global main
+    if not db_name.endswith(BENCH_DB_SUFFIX):
+        raise SystemExit(f"Refusing to use database {db_name!r}: benchmark databases must end in {BENCH_DB_SUFFIX!r}")
+    # Override, never default: settings exported for the real app must not leak in.
+    # The app reads these at import time
+    os.environ["MONGO_URI"] = uri
+    os.environ["MONGO_DB_NAME"] = db_name
+    os.environ["TENANT_DATABASES"] = ""
+    os.environ["SCHEDULER_ENABLED"] = "false"
+    import main as app
+    main = app
+    return app
+
+def sentence(rng, words=4):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def insert_chunked(collection, docs):
+    # Everything is seeded into the default society, which shares the main database
+    for doc in docs:
+        doc["society_id"] = main.DEFAULT_SOCIETY_ID
+    for i in range(0, len(docs), SEED_CHUNK):
+        collection.insert_many(docs[i:i + SEED_CHUNK], ordered=False)
+
+def seed(args, rng):
+    """Drop and reseed the benchmark database; returns the ids the traffic scripts need."""
+    if not main.MONGO_DB_NAME.endswith(BENCH_DB_SUFFIX):
+        raise RuntimeError(f"Refusing to drop non-benchmark database {main.MONGO_DB_NAME!r}")
+    sync_client = MongoClient(main.MONGO_URI)
+    sync_client.drop_database(main.MONGO_DB_NAME)
+    db = sync_client[main.MONGO_DB_NAME]
+    now = datetime.utcnow()
+    # Every seeded user shares one hash; hashing thousands of passwords would dominate seeding
+    hashed_password = main.get_password_hash(BENCH_PASSWORD)
+
+    def user(role, i, address):
+        return {
+            "email": f"{role}{i}@bench.local",
+            "hashed_password": hashed_password,
+            "role": role,
+            "name": f"{role.title()} {i}",
+            "phone": f"9{i:09d}",
+            "address": address,
+        }
+
+    users = [user("admin", 0, "Office")]
+    users += [user("security", i, "Gate") for i in range(args.security)]
+    users += [user("resident", i, f"T{i % 20}-{i // 20 + 101}") for i in range(args.residents)]
+    insert_chunked(db["users"], users)
+    residents = [u for u in users if u["role"] == "resident"]
+
+    facilities = [{"name": f"Facility {i}", "available_slots": SLOTS} for i in range(args.facilities)]
+    insert_chunked(db["facilities"], facilities)
+
+    insert_chunked(db["complaints"], [
+        {
+            "title": sentence(rng, 3),
+            "description": sentence(rng, 12),
+            "resident_id": str(rng.choice(residents)["_id"]),
+            "status": rng.choice(["pending", "resolved", "resolved"]),
+            "created_at": now - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+        }
+        for _ in range(args.complaints)
+    ])
+
+    # Bookings must respect the one-claim-per-slot-per-day index, so sample distinct triples
+    claims = set()
+    days = [(now.date() + timedelta(days=offset)).isoformat() for offset in range(-60, 14)]
+    while len(claims) < min(args.bookings, len(facilities) * len(days) * len(SLOTS)):
+        claims.add((rng.randrange(len(facilities)), rng.choice(days), rng.choice(SLOTS)))
+    insert_chunked(db["bookings"], [
+        {
+            "facility_id": str(facilities[facility]["_id"]),
+            "facility_name": facilities[facility]["name"],
+            "slot": slot,
+            "booking_date": day,
+            "resident_id": str(rng.choice(residents)["_id"]),
+            "booked_at": min(day, now.date().isoformat()),
+        }
+        for facility, day, slot in claims
+    ])
+
+    visitors = []
+    for _ in range(args.visitors):
+        resident = rng.choice(residents)
+        visitors.append({
+            "name": f"{sentence(rng, 1).title()} {rng.randrange(1000)}",
+            "purpose": sentence(rng, 3),
+            "resident_id": str(resident["_id"]),
+            "flat": resident["address"],
+            "status": rng.choice(["pending", "approve", "deny", "entered", "exited", "exited", "exited"]),
+            "created_at": now - timedelta(minutes=rng.randrange(90 * 24 * 60)),
+        })
+    insert_chunked(db["visitors"], visitors)
+    sync_client.close()
+
+    return {
+        "admin": [users[0]],
+        "security": [u for u in users if u["role"] == "security"],
+        "resident": residents,
+        "facility_ids": [str(f["_id"]) for f in facilities],
+        "approved_visitor_ids": [str(v["_id"]) for v in visitors if v["status"] == "approve"],
+    }
+
+def auth(user):
+    token = main.create_access_token({"sub": str(user["_id"]), "role": user["role"], "society": user["society_id"]})
+    return {"Authorization": f"Bearer {token}"}
+
+def build_operations(seeded, rng):
+    """Scripted requests per role as (weight, name, request factory) tuples."""
+    def resident_booking():
+        day = (datetime.utcnow().date() + timedelta(days=rng.randrange(1, 14))).isoformat()
+        return "POST", "/api/bookings", {
+            "json": {"facility_id": rng.choice(seeded["facility_ids"]), "slot": rng.choice(SLOTS), "booking_date": day}
+        }
+
+    def security_enter():
+        # Approved visitors can enter once; afterwards the request is an expected 409
+        return "POST", f"/api/security/visitors/{rng.choice(seeded['approved_visitor_ids'])}/update-status", {
+            "params": {"status": "entered"}
+        }
+
+    return {
+        "resident": [
+            (10, "GET /me", lambda: ("GET", "/me", {})),
+            (15, "GET /api/facilities", lambda: ("GET", "/api/facilities", {})),
+            (10, "GET /api/facilities/{id}/availability", lambda: (
+                "GET", f"/api/facilities/{rng.choice(seeded['facility_ids'])}/availability", {}
+            )),
+            (15, "GET /api/visitors/pending", lambda: ("GET", "/api/visitors/pending", {})),
+            (10, "GET /api/complaints", lambda: ("GET", "/api/complaints", {})),
+            (10, "GET /api/bookings", lambda: ("GET", "/api/bookings", {})),
+            (3, "POST /api/complaints", lambda: (
+                "POST", "/api/complaints", {"json": {"title": sentence(rng, 3), "description": sentence(rng, 10)}}
+            )),
+            (3, "POST /api/bookings", resident_booking),
+        ],
+        "admin": [
+            (20, "GET /api/admin/stats", lambda: ("GET", "/api/admin/stats", {})),
+            (15, "GET /api/admin/complaints", lambda: ("GET", "/api/admin/complaints", {"params": {"status": "pending"}})),
+            (15, "GET /api/admin/visitors", lambda: ("GET", "/api/admin/visitors", {})),
+            (10, "GET /api/admin/bookings", lambda: ("GET", "/api/admin/bookings", {})),
+            (5, "GET /api/admin/search", lambda: ("GET", "/api/admin/search", {"params": {"q": rng.choice(WORDS)}})),
+        ],
+        "security": [
+            (20, "GET /api/security/visitors", lambda: ("GET", "/api/security/visitors", {"params": {"status": "pending"}})),
+            (10, "POST /api/security/visitors", lambda: ("POST", "/api/security/visitors", {
+                "json": {"name": sentence(rng, 2).title(), "purpose": sentence(rng, 3),
+                         "resident_id": str(rng.choice(seeded["resident"])["_id"])}
+            })),
+            (5, "POST /api/security/visitors/{id}/update-status", security_enter),
+        ],
+    }
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+    }
+
+def mongo_command_count():
+    return sum(series[-1] for series in main.mongo_command_duration.values.values())
+
+async def run_traffic(args, seeded, rng, concurrency=None):
+    concurrency = concurrency or args.concurrency
+    operations = build_operations(seeded, rng)
+    headers = {role: [auth(user) for user in seeded[role]] for role in ("admin", "security", "resident")}
+    mix = MIXES[args.mix]
+    roles, role_weights = list(mix), list(mix.values())
+    latencies = {}
+    errors = {}
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(http):
+        while time.perf_counter() < deadline:
+            role = rng.choices(roles, role_weights)[0]
+            _, name, factory = rng.choices(operations[role], [op[0] for op in operations[role]])[0]
+            method, path, kwargs = factory()
+            started = time.perf_counter()
+            response = await http.request(method, path, headers=rng.choice(headers[role]), **kwargs)
+            latencies.setdefault(name, []).append(time.perf_counter() - started)
+            # 409s are expected outcomes of contention, not failures
+            if response.status_code >= 400 and response.status_code != 409:
+                errors[name] = errors.get(name, 0) + 1
+
+    # Unhandled exceptions become 500s and count as errors instead of aborting the run
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        # Warm the pool and caches so the first requests don't skew percentiles
+        await asyncio.gather(*(http.get("/api/facilities") for _ in range(min(concurrency, 10))))
+        commands_before = mongo_command_count()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        commands = mongo_command_count() - commands_before
+
+    total = sum(len(values) for values in latencies.values())
+    overall = summarize([value for values in latencies.values() for value in values], elapsed)
+    overall["errors"] = sum(errors.values())
+    overall["mongo_commands_per_request"] = round(commands / total, 2) if total else None
+    endpoints = {}
+    for name, values in sorted(latencies.items()):
+        endpoints[name] = summarize(values, elapsed)
+        endpoints[name]["errors"] = errors.get(name, 0)
+    return overall, endpoints
+
+# Scenarios: name -> (coroutine(args, seeded, rng) returning a result dict, needs a seeded mongod)
+SCENARIOS = {}
+
+def scenario(name, needs_db=True):
+    def register(func):
+        SCENARIOS[name] = (func, needs_db)
+        return func
+    return register
+
+@scenario("traffic")
+async def scenario_traffic(args, seeded, rng):
+    overall, endpoints = await run_traffic(args, seeded, rng)
+    return {"overall": overall, "endpoints": endpoints}
+
+class BlockingCursor:
+    """Async-looking cursor over a synchronous one; every fetch blocks the event loop."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, limit):
+        self._cursor = self._cursor.limit(limit)
+        return self
+
+    def batch_size(self, size):
+        self._cursor = self._cursor.batch_size(size)
+        return self
+
+    async def to_list(self, length=None):
+        return list(itertools.islice(self._cursor, length))
+
+    async def __aiter__(self):
+        for doc in self._cursor:
+            yield doc
+
+    async def close(self):
+        self._cursor.close()
+
+class BlockingCollection:
+    """The pre-async data layer: a synchronous PyMongo call made straight from an async route."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def find(self, *args, **kwargs):
+        return BlockingCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, *args, **kwargs):
+        return BlockingCursor(self._collection.aggregate(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+class BlockingDatabase:
+    def __init__(self, database):
+        self._database = database
+        self.name = database.name
+
+    def __getitem__(self, name):
+        return BlockingCollection(self._database[name])
+
+@scenario("concurrency")
+async def scenario_concurrency(args, seeded, rng):
+    """Mixed traffic at rising client counts, on the async driver and on the blocking driver it replaced.
+
+    The blocking run reuses the app unchanged and swaps its database for synchronous PyMongo
+    calls, so every query stalls the event loop as the original data layer did.
+    """
+    levels = {}
+    for level in args.levels:
+        overall, _ = await run_traffic(args, seeded, rng, concurrency=level)
+        levels[f"{level} clients, async"] = overall
+
+    sync_client = MongoClient(main.MONGO_URI, maxPoolSize=main.MONGO_MAX_POOL_SIZE,
+                              event_listeners=[main.CommandMetricsListener()])
+    async_db = main.db
+    main.db = BlockingDatabase(sync_client[main.MONGO_DB_NAME])
+    try:
+        for level in args.levels:
+            overall, _ = await run_traffic(args, seeded, rng, concurrency=level)
+            levels[f"{level} clients, blocking"] = overall
+    finally:
+        main.db = async_db
+        sync_client.close()
+    return {"rows": levels}
+
+@scenario("login-storm")
+async def scenario_login_storm(args, seeded, rng):
+    """Morning rush: residents log in at once, all arriving through one proxy address.
+
+    Bystander clients keep calling cheap endpoints throughout, then again for as long with no
+    storm; if bcrypt blocked the event loop their latency would balloon during the storm.
+    """
+    bystander_requests = [
+        ("GET /me", "/me", lambda: auth(rng.choice(seeded["resident"]))),
+        ("GET /api/facilities", "/api/facilities", lambda: {}),
+    ]
+
+    async def bystanders(http, until):
+        latencies = {name: [] for name, _, _ in bystander_requests}
+
+        async def worker():
+            while not until():
+                name, path, headers = rng.choice(bystander_requests)
+                started = time.perf_counter()
+                await http.get(path, headers=headers())
+                latencies[name].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.bystanders)))
+        elapsed = time.perf_counter() - started
+        return {name: summarize(values, elapsed) for name, values in latencies.items()}
+
+    pending = list(seeded["resident"][:args.logins])
+    latencies, statuses = [], {}
+
+    async def login_worker(http):
+        while pending:
+            user = pending.pop()
+            started = time.perf_counter()
+            response = await http.post("/login", data={"username": user["email"], "password": BENCH_PASSWORD})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # Every request shares the transport's client address, as it would behind a reverse proxy
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        storm = asyncio.gather(*(login_worker(http) for _ in range(args.concurrency)))
+        during = asyncio.ensure_future(bystanders(http, storm.done))
+        await storm
+        elapsed = time.perf_counter() - started
+        during = await during
+        quiet_until = time.perf_counter() + elapsed
+        quiet = await bystanders(http, lambda: time.perf_counter() >= quiet_until)
+    # 429s here are bcrypt load shedding (PASSWORD_HASH_MAX_PENDING), never the failed-login limiter
+    rows = {"logins": {**summarize(latencies, elapsed), "statuses": statuses}}
+    for name in during:
+        rows[f"{name}, during storm"] = during[name]
+        rows[f"{name}, quiet"] = quiet[name]
+    return {"rows": rows}
+
+@scenario("booking-contention")
+async def scenario_booking_contention(args, seeded, rng):
+    """--concurrency residents race for the same slot, --rounds times over fresh slots.
+
+    Exactly one claim per round may win; the rest must be 409s from the unique index.
+    """
+    residents = [auth(resident) for resident in seeded["resident"]]
+    latencies, statuses, double_booked = [], {}, 0
+    # Far enough ahead that the seeded bookings never hold these slots
+    first_day = datetime.utcnow().date() + timedelta(days=30)
+
+    async def claim(http, booking):
+        started = time.perf_counter()
+        response = await http.post("/api/bookings", json=booking, headers=rng.choice(residents))
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return response.status_code
+
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        for round_number in range(args.rounds):
+            booking = {
+                "facility_id": seeded["facility_ids"][round_number % len(seeded["facility_ids"])],
+                "slot": SLOTS[round_number % len(SLOTS)],
+                "booking_date": (first_day + timedelta(days=round_number)).isoformat(),
+            }
+            results = await asyncio.gather(*(claim(http, booking) for _ in range(args.concurrency)))
+            double_booked += results.count(200) > 1
+        elapsed = time.perf_counter() - started
+    # Booking requests handled per second, winners and 409s alike
+    row = summarize(latencies, elapsed)
+    row["bookings_per_s"] = row.pop("throughput_rps")
+    return {"rows": {"contended claims": {**row, "statuses": statuses, "double_booked_rounds": double_booked}}}
+
+async def time_requests(http, samples, factory, headers=None):
+    """Issues samples requests one at a time; returns a summarize() row plus status counts."""
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    for _ in range(samples):
+        method, path, kwargs = factory()
+        request_started = time.perf_counter()
+        response = await http.request(method, path, headers=headers, **kwargs)
+        latencies.append(time.perf_counter() - request_started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return {**summarize(latencies, time.perf_counter() - started), "statuses": statuses}
+
+@scenario("pending-growth")
+async def scenario_pending_growth(args, seeded, rng):
+    """A resident's pending list as their visit history grows. With the
+    (society_id, resident_id, status, created_at) index, docs examined tracks the pending count only."""
+    resident = seeded["resident"][0]
+    resident_id = str(resident["_id"])
+    visitors = main.db["visitors"]
+    query = {"society_id": main.DEFAULT_SOCIETY_ID, "resident_id": resident_id, "status": "pending"}
+    now = datetime.utcnow()
+    rows, history = {}, await visitors.count_documents({"resident_id": resident_id})
+
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for target in args.history:
+            # Top up with settled visits, the part of history the pending list must not read
+            settled = [
+                {
+                    "name": f"{sentence(rng, 1).title()} {rng.randrange(1000)}",
+                    "purpose": sentence(rng, 3),
+                    "resident_id": resident_id,
+                    "flat": resident["address"],
+                    "status": rng.choice(["deny", "exited"]),
+                    "created_at": now - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+                    "society_id": main.DEFAULT_SOCIETY_ID,
+                }
+                for _ in range(max(target - history, 0))
+            ]
+            for i in range(0, len(settled), SEED_CHUNK):
+                await visitors.insert_many(settled[i:i + SEED_CHUNK], ordered=False)
+            history = max(target, history)
+            row = await time_requests(http, args.samples, lambda: ("GET", "/api/visitors/pending", {}), auth(resident))
+            explain = await visitors.find(query, main.VISITOR_LIST_PROJECTION).sort("created_at", -1).explain()
+            row["keys_examined"] = explain["executionStats"]["totalKeysExamined"]
+            row["docs_examined"] = explain["executionStats"]["totalDocsExamined"]
+            rows[f"{history} visits"] = row
+    return {"rows": rows}
+
+@scenario("search")
+async def scenario_search(args, seeded, rng):
+    """Admin search latency once complaints plus visitors reach --search-docs, with filters and deep offsets."""
+    complaints, visitors = main.db["complaints"], main.db["visitors"]
+    residents = [str(resident["_id"]) for resident in seeded["resident"]]
+    now = datetime.utcnow()
+    missing = args.search_docs - await complaints.count_documents({}) - await visitors.count_documents({})
+    # Top up in halves, in chunks, so a 500k corpus never sits in memory at once
+    for collection, count in ((complaints, missing // 2), (visitors, missing - missing // 2)):
+        for start in range(0, max(count, 0), SEED_CHUNK):
+            if collection is complaints:
+                docs = [
+                    {"title": sentence(rng, 3), "description": sentence(rng, 12), "resident_id": rng.choice(residents),
+                     "status": rng.choice(["pending", "resolved", "resolved"]),
+                     "created_at": now - timedelta(minutes=rng.randrange(365 * 24 * 60))}
+                    for _ in range(min(SEED_CHUNK, count - start))
+                ]
+            else:
+                docs = [
+                    {"name": f"{sentence(rng, 1).title()} {rng.randrange(1000)}", "purpose": sentence(rng, 3),
+                     "resident_id": rng.choice(residents), "flat": None, "status": "exited",
+                     "created_at": now - timedelta(minutes=rng.randrange(90 * 24 * 60))}
+                    for _ in range(min(SEED_CHUNK, count - start))
+                ]
+            for doc in docs:
+                doc["society_id"] = main.DEFAULT_SOCIETY_ID
+            await collection.insert_many(docs, ordered=False)
+    # The in-memory backend only indexes at startup; the Mongo backend has nothing to rebuild
+    await main.search_backend.start()
+
+    # Params per row; "words" sets how many random words go in q
+    queries = {
+        "all, one word": {},
+        "all, two words": {"words": 2},
+        "complaints, pending": {"type": "complaints", "status": "pending"},
+        "visitors, last 7 days": {"type": "visitors", "date_from": (now.date() - timedelta(days=7)).isoformat()},
+        "all, offset 500": {"offset": 500},
+    }
+    rows = {}
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for name, template in queries.items():
+            def factory(template=template):
+                params = {key: value for key, value in template.items() if key != "words"}
+                params["q"] = sentence(rng, template.get("words", 1))
+                return "GET", "/api/admin/search", {"params": params}
+
+            rows[name] = await time_requests(http, args.samples, factory, auth(seeded["admin"][0]))
+    return {"rows": rows}
+
+@scenario("import")
+async def scenario_import(args, seeded, rng):
+    """Expected visitors loaded through one bulk import vs one POST /api/security/visitors each."""
+    admin, security = auth(seeded["admin"][0]), auth(seeded["security"][0])
+    rows = {}
+
+    def visitor_rows(count):
+        return [
+            {"name": f"{sentence(rng, 1).title()} {rng.randrange(1000)}", "purpose": sentence(rng, 3),
+             "flat": rng.choice(seeded["resident"])["address"]}
+            for _ in range(count)
+        ]
+
+    def measure(started, commands_before, count, statuses, **extra):
+        elapsed = time.perf_counter() - started
+        return {
+            "rows": count,
+            **extra,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "rows_per_s": round(count / elapsed, 1),
+            "mongo_commands": mongo_command_count() - commands_before,
+            "statuses": statuses,
+        }
+
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        for count in args.import_rows:
+            batch = visitor_rows(count)
+            commands_before, started = mongo_command_count(), time.perf_counter()
+            response = await http.post("/api/admin/import/visitors", json=batch, headers=admin)
+            rows[f"{count} bulk json"] = measure(started, commands_before, count, {response.status_code: 1},
+                                                 inserted=response.json().get("inserted"))
+
+            batch = visitor_rows(count)
+            body = "name,purpose,flat\n" + "".join(f"{row['name']},{row['purpose']},{row['flat']}\n" for row in batch)
+            commands_before, started = mongo_command_count(), time.perf_counter()
+            response = await http.post("/api/admin/import/visitors", content=body,
+                                       headers={**admin, "Content-Type": "text/csv"})
+            rows[f"{count} bulk csv"] = measure(started, commands_before, count, {response.status_code: 1},
+                                                inserted=response.json().get("inserted"))
+
+            # The per-item path, driven by --concurrency guards at once
+            pending, statuses = visitor_rows(count), {}
+
+            async def worker():
+                while pending:
+                    response = await http.post("/api/security/visitors", json=pending.pop(), headers=security)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            commands_before, started = mongo_command_count(), time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            rows[f"{count} per-item"] = measure(started, commands_before, count, statuses)
+    return {"rows": rows}
+
+@scenario("encode", needs_db=False)
+async def scenario_encode(args, seeded, rng):
+    """Time and peak memory of encoding raw visitor documents: BSONResponse's single pass vs
+    jsonable_encoder and FastAPI's response_model path. Peaks exclude the input documents."""
+    adapter = TypeAdapter(List[main.VisitorOut])
+    now = datetime.utcnow()
+    rows = {}
+    for size in args.sizes:
+        docs = [
+            {
+                "_id": ObjectId(),
+                "name": f"{sentence(rng, 1).title()} {rng.randrange(1000)}",
+                "purpose": sentence(rng, 3),
+                "resident_id": str(ObjectId()),
+                "flat": f"T{i % 20}-{i // 20 + 101}",
+                "status": "pending",
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": None,
+            }
+            for i in range(size)
+        ]
+        paths = {
+            "bson_response": lambda: main.dumps_bson(docs),
+            "jsonable_encoder": lambda: json.dumps(jsonable_encoder(docs, custom_encoder={ObjectId: str})).encode(),
+            # What returning dicts through response_model costs: stringify ids, validate, serialize
+            "response_model": lambda: adapter.dump_json(
+                adapter.validate_python([{**doc, "_id": str(doc["_id"])} for doc in docs]), by_alias=True
+            ),
+        }
+        row = {}
+        for name, encode in paths.items():
+            started = time.perf_counter()
+            body = encode()
+            row[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            del body
+            # Traced separately: tracemalloc slows allocation-heavy code several times over
+            tracemalloc.start()
+            try:
+                encode()
+                row[f"{name}_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            finally:
+                tracemalloc.stop()
+        row["body_bytes"] = len(main.dumps_bson(docs))
+        rows[f"{size} docs"] = row
+    return {"rows": rows}
+
+@scenario("logging", needs_db=False)
+async def scenario_logging(args, seeded, rng):
+    return {"rows": {"logging": benchmark_logging(args.iterations)}}
+
+def benchmark_logging(iterations):
+    """Event-loop cost per login of the old f-string logging vs the queued, sampled logger."""
+    legacy = logging.getLogger("benchmark.legacy")
+    legacy.propagate = False
+    legacy.setLevel(logging.INFO)
+    email, user_id = "resident1@bench.local", str(ObjectId())
+    results = {}
+    with open(os.devnull, "w") as sink:
+        # What a successful login used to do: four eagerly formatted lines through a synchronous stream handler
+        legacy.handlers = [logging.StreamHandler(sink)]
+        started = time.perf_counter()
+        for _ in range(iterations):
+            legacy.info(f"Login attempt for email: {email}")
+            legacy.info(f"User found: {email}, verifying password")
+            legacy.info(f"Password verified for email: {email}")
+            legacy.info(f"Generated access token for user_id: {user_id}")
+        results["sync_fstring_us_per_request"] = round((time.perf_counter() - started) / iterations * 1e6, 2)
+
+        # The caller only pays for sampling and enqueueing; point the listener at /dev/null meanwhile
+        stream_handlers = main.log_listener.handlers
+        main.log_listener.handlers = (logging.StreamHandler(sink),)
+        try:
+            for sample_rate in (1.0, main.LOG_SAMPLE_RATE):
+                main.LOG_SAMPLE_RATE = sample_rate
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    main.log_sampled("Login succeeded", role="resident")
+                    main.log_sampled("Request %s %s", "POST", "/login", status=200, duration_ms=1.0, db_command_count=1)
+                elapsed = time.perf_counter() - started
+                results[f"queued_json_sample_{sample_rate:g}_us_per_request"] = round(elapsed / iterations * 1e6, 2)
+            while not main.log_listener.queue.empty():
+                time.sleep(0.01)
+        finally:
+            main.log_listener.handlers = stream_handlers
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_rows(result):
+    print(f"commit {result['commit']}  scenario={result['scenario']}")
+    for name, stats in result["rows"].items():
+        print(f"{name:32} " + "  ".join(f"{key}={value}" for key, value in stats.items()))
+
+def print_report(result, baseline=None):
+    print(f"commit {result['commit']}  mix={result['config']['mix']}  concurrency={result['config']['concurrency']}")
+    header = f"{'endpoint':48} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}"
+    if baseline:
+        header += f" {'Δp95':>8} {'Δrps':>8}"
+    print(header)
+    rows = [("overall", result["overall"])] + list(result["endpoints"].items())
+    base_rows = dict([("overall", baseline["overall"])] + list(baseline["endpoints"].items())) if baseline else {}
+    for name, stats in rows:
+        line = (f"{name:48} {stats['requests']:>7} {stats['throughput_rps']:>8} {stats['p50_ms'] or '-':>8} "
+                f"{stats['p95_ms'] or '-':>8} {stats['p99_ms'] or '-':>8} {stats['errors']:>5}")
+        base = base_rows.get(name)
+        if base and base.get("p95_ms") and stats.get("p95_ms"):
+            line += f" {stats['p95_ms'] - base['p95_ms']:>+8.2f} {stats['throughput_rps'] - base['throughput_rps']:>+8.1f}"
+        print(line)
+    print(f"mongo commands/request: {result['overall']['mongo_commands_per_request']}")
+
+async def run(args):
+    rng = random.Random(args.seed)
+    func, needs_db = SCENARIOS[args.scenario]
+    if needs_db:
+        seeded = seed(args, rng)
+        async with main.lifespan(main.app):
+            result = await func(args, seeded, rng)
+    else:
+        result = await func(args, None, rng)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "scenario": args.scenario,
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "uri")},
+        **result,
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the esociety API against a seeded local mongod.")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="esociety_bench", help=f"database to drop and reseed; must end in {BENCH_DB_SUFFIX}")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="traffic")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent simulated clients")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--residents", type=int, default=2000)
+    parser.add_argument("--security", type=int, default=10)
+    parser.add_argument("--facilities", type=int, default=10)
+    parser.add_argument("--complaints", type=int, default=20000)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--visitors", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1710, help="random seed for data and traffic")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="baseline results JSON to diff against")
+    parser.add_argument("--levels", type=lambda value: [int(level) for level in value.split(",")],
+                        default=[10, 50, 100, 200], help="client counts for the concurrency scenario")
+    parser.add_argument("--logins", type=int, default=500, help="residents logging in during the login-storm scenario")
+    parser.add_argument("--rounds", type=int, default=50, help="slots raced for in the booking-contention scenario")
+    parser.add_argument("--bystanders", type=int, default=10, help="clients calling other endpoints during the login storm")
+    parser.add_argument("--history", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[1000, 10000, 100000], help="visits in one resident's history for the pending-growth scenario")
+    parser.add_argument("--samples", type=int, default=200, help="sequential requests timed per row in row scenarios")
+    parser.add_argument("--search-docs", type=int, default=500000,
+                        help="complaints plus visitors to search over in the search scenario")
+    parser.add_argument("--import-rows", type=lambda value: [int(count) for count in value.split(",")],
+                        default=[100, 1000, 5000], help="rows per import in the import scenario (at most MAX_IMPORT_ROWS)")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[10000, 100000], help="documents encoded per row by the encode scenario")
+    parser.add_argument("--iterations", type=int, default=20000, help="requests simulated by the logging scenario")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    load_app(args.uri, args.db)
+    result = asyncio.run(run(args))
+    if "rows" in result:
+        print_rows(result)
+    else:
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
@@ -1,28 +1,456 @@
 # main.py
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pymongo import MongoClient
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
+from pymongo import AsyncMongoClient, CursorType, ReturnDocument, monitoring
+from pymongo.errors import CollectionInvalid
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from bson import ObjectId
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from datetime import date, datetime, time as dt_time, timedelta
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 import re
+import io
+import copy
+import queue
+import atexit
+import uuid
+import random
+import csv
+import json
+import zlib
+import ipaddress
+import asyncio
 import logging
+import time
 import os  # Added for environment variables
 from dotenv import load_dotenv  # Added for loading .env file
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# JSON serialization
+def bson_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_bson(content) -> bytes:
+    # ObjectId and datetime are converted during encoding, in a single pass
+    if orjson is not None:
+        return orjson.dumps(content, default=bson_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=bson_default, separators=(",", ":")).encode()
+
+class BSONResponse(JSONResponse):
+    """JSON response that encodes raw Mongo documents without a pre-pass."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bson(content)
+
+# Logging
+# The event loop only enqueues records; a QueueListener thread formats and writes them.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))  # Share of high-volume INFO events kept
+TEXT_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Correlation id of the request being served, echoed in the X-Request-ID response header
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through extra= and is a structured field
+STANDARD_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request id and society while still in the request's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.society_id = current_society.get()
+        return True
+
+class ContextQueueHandler(QueueHandler):
+    """Queue handler that leaves JSON formatting and the write to the listener thread.
+
+    The message and any traceback are still rendered here, on the logging thread: args may be
+    mutated after the call returns and exc_info holds live frames, so neither can cross threads.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what can't safely cross threads: the message args and the live traceback
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        try:
+            return dumps_bson(entry).decode()
+        except TypeError:
+            # An extra= field the encoder doesn't know; degrade to its repr rather than drop the record
+            return json.dumps(entry, default=repr)
+
+def configure_logging() -> QueueListener:
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
+
+log_listener = configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+def log_sampled(message: str, *args, **fields):
+    # Sampled before a record is built, so dropped events cost a single random() call
+    if LOG_SAMPLE_RATE >= 1 or random.random() < LOG_SAMPLE_RATE:
+        logger.info(message, *args, extra=fields)
+
+# Metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+DB_COMMAND_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))  # 0 disables the slow-request log
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help_text, self.labels = name, help_text, labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, label_values: tuple = (), amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self, kind: str = "counter") -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {kind}"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Gauge(Counter):
+    def dec(self, label_values: tuple = (), amount: float = 1):
+        self.inc(label_values, -amount)
+
+    def render(self) -> List[str]:
+        return super().render("gauge")
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple):
+        self.name, self.help_text, self.labels, self.buckets = name, help_text, labels, buckets
+        self.values: Dict[tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, label_values: tuple, value: float):
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in self.values.items():
+            for bound, count in zip(self.buckets, series):
+                labels = format_labels(self.labels + ("le",), label_values + (str(bound),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = format_labels(self.labels + ("le",), label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, label_values)} {series[-2]}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, label_values)} {series[-1]}")
+        return lines
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+http_requests_total = Counter("esociety_http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "esociety_http_request_duration_seconds", "HTTP request latency.", ("method", "route"), LATENCY_BUCKETS
+)
+http_requests_in_flight = Gauge("esociety_http_requests_in_flight", "HTTP requests currently being served.")
+http_response_size = Histogram("esociety_http_response_size_bytes", "HTTP response body size.", ("route",), SIZE_BUCKETS)
+http_request_db_commands = Histogram(
+    "esociety_http_request_db_commands", "MongoDB commands issued per request.", ("route",), DB_COMMAND_BUCKETS
+)
+http_request_db_duration = Histogram(
+    "esociety_http_request_db_seconds", "Time spent in MongoDB per request.", ("route",), LATENCY_BUCKETS
+)
+mongo_command_duration = Histogram(
+    "esociety_mongo_command_duration_seconds", "MongoDB command latency.", ("command",), LATENCY_BUCKETS
+)
+mongo_command_failures = Counter("esociety_mongo_command_failures_total", "Failed MongoDB commands.", ("command",))
+mongo_pool_connections = Gauge("esociety_mongo_pool_connections", "MongoDB pool connections.", ("state",))
+mongo_pool_checkout_failures = Counter(
+    "esociety_mongo_pool_checkout_failures_total", "Failed MongoDB connection checkouts.", ("reason",)
+)
+METRICS = [
+    http_requests_total, http_request_duration, http_requests_in_flight, http_response_size,
+    http_request_db_commands, http_request_db_duration, mongo_command_duration, mongo_command_failures,
+    mongo_pool_connections, mongo_pool_checkout_failures,
+]
+
+# Per-request record of the Mongo commands issued, filled in by the command listener
+request_db_commands: ContextVar[Optional[list]] = ContextVar("request_db_commands", default=None)
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        seconds = event.duration_micros / 1e6
+        mongo_command_duration.observe((event.command_name,), seconds)
+        commands = request_db_commands.get()
+        if commands is not None:
+            commands.append((event.command_name, seconds))
+
+    def failed(self, event):
+        seconds = event.duration_micros / 1e6
+        mongo_command_failures.inc((event.command_name,))
+        commands = request_db_commands.get()
+        if commands is not None:
+            commands.append((event.command_name, seconds))
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(("open",))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(("open",))
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc((str(event.reason),))
+
+    def connection_checked_out(self, event):
+        mongo_pool_connections.inc(("in_use",))
+
+    def connection_checked_in(self, event):
+        mongo_pool_connections.dec(("in_use",))
+
+# MongoDB setup
+# The async client connects lazily; pool size and timeouts are tunable per deployment.
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "esocietydb")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+
+def create_client(uri: str) -> AsyncMongoClient:
+    return AsyncMongoClient(
+        uri,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        event_listeners=[CommandMetricsListener(), PoolMetricsListener()],
+    )
+
+client = create_client(MONGO_URI)
+db = client[MONGO_DB_NAME]  # Shared tenant data plus process-wide collections (leases, events)
+
+# Multi-society tenancy
+# Every tenant document carries a society_id, and tenant collections add it to every query.
+# Societies share MONGO_DB_NAME unless TENANT_DATABASES gives them their own database,
+# optionally on another cluster: "acme=esociety_acme,big=mongodb://host:27017/esociety_big"
+DEFAULT_SOCIETY_ID = os.getenv("DEFAULT_SOCIETY_ID", "default")
+TENANT_DATABASES = os.getenv("TENANT_DATABASES", "")
+SOCIETY_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Set from the caller's token (or X-Society-ID header) for the duration of a request
+current_society: ContextVar[Optional[str]] = ContextVar("current_society", default=None)
+
+def current_society_id() -> str:
+    society_id = current_society.get()
+    if society_id is None:
+        # Fail closed: an unscoped query would read every society's data
+        raise RuntimeError("Tenant-scoped query issued outside a society context")
+    return society_id
+
+class TenantRouter:
+    """Maps each society to the database holding its data."""
+
+    def __init__(self, spec: str):
+        self.clients: Dict[str, AsyncMongoClient] = {MONGO_URI: client}
+        self.dedicated: Dict[str, Any] = {}
+        self._databases: Dict[tuple, Any] = {(MONGO_URI, MONGO_DB_NAME): db}
+        for entry in filter(None, (part.strip() for part in spec.split(","))):
+            society_id, _, target = (part.strip() for part in entry.partition("="))
+            if not SOCIETY_ID_RE.match(society_id) or not target:
+                raise ValueError(f"Invalid TENANT_DATABASES entry: {entry!r}")
+            if target.startswith(("mongodb://", "mongodb+srv://")):
+                uri, database_name = target, urlsplit(target).path.lstrip("/")
+                if not database_name:
+                    raise ValueError(f"TENANT_DATABASES URI for {society_id} must name a database")
+            else:
+                uri, database_name = MONGO_URI, target
+            if uri not in self.clients:
+                self.clients[uri] = create_client(uri)
+            key = (uri, database_name)
+            if key not in self._databases:
+                self._databases[key] = self.clients[uri][database_name]
+            self.dedicated[society_id] = self._databases[key]
+
+    def database(self, society_id: str):
+        return self.dedicated.get(society_id, db)
+
+    def databases(self) -> List[Any]:
+        """Every distinct tenant database, the shared one first."""
+        return list(self._databases.values())
+
+tenant_router = TenantRouter(TENANT_DATABASES)
+
+class TenantCollection:
+    """Collection proxy that confines every read and write to the current society."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _scoped(self, filter: Optional[dict]):
+        society_id = current_society_id()
+        # Set last so a caller-supplied society_id can never widen the query
+        return tenant_router.database(society_id)[self.name], {**(filter or {}), "society_id": society_id}
+
+    def find(self, filter: Optional[dict] = None, *args, **kwargs):
+        collection, filter = self._scoped(filter)
+        return collection.find(filter, *args, **kwargs)
+
+    async def find_one(self, filter: Optional[dict] = None, *args, **kwargs):
+        collection, filter = self._scoped(filter)
+        return await collection.find_one(filter, *args, **kwargs)
+
+    async def find_one_and_update(self, filter: dict, update: dict, **kwargs):
+        collection, filter = self._scoped(filter)
+        return await collection.find_one_and_update(filter, update, **kwargs)
+
+    async def find_one_and_delete(self, filter: dict, **kwargs):
+        collection, filter = self._scoped(filter)
+        return await collection.find_one_and_delete(filter, **kwargs)
+
+    async def update_one(self, filter: dict, update: dict, **kwargs):
+        collection, filter = self._scoped(filter)
+        return await collection.update_one(filter, update, **kwargs)
+
+    async def delete_many(self, filter: dict, **kwargs):
+        collection, filter = self._scoped(filter)
+        return await collection.delete_many(filter, **kwargs)
+
+    async def aggregate(self, pipeline: List[dict], **kwargs):
+        collection, match = self._scoped(None)
+        return await collection.aggregate([{"$match": match}, *pipeline], **kwargs)
+
+    async def insert_one(self, document: dict, **kwargs):
+        society_id = current_society_id()
+        document["society_id"] = society_id
+        return await tenant_router.database(society_id)[self.name].insert_one(document, **kwargs)
+
+    async def insert_many(self, documents: List[dict], **kwargs):
+        society_id = current_society_id()
+        for document in documents:
+            document["society_id"] = society_id
+        return await tenant_router.database(society_id)[self.name].insert_many(documents, **kwargs)
+
+users_collection = TenantCollection("users")
+complaints_collection = TenantCollection("complaints")
+bookings_collection = TenantCollection("bookings")
+visitors_collection = TenantCollection("visitors")
+facilities_collection = TenantCollection("facilities")
+catalog_versions_collection = TenantCollection("catalog_versions")  # One document per society
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the pools and fail fast if any MongoDB deployment is unreachable
+    for mongo_client in tenant_router.clients.values():
+        await mongo_client.aconnect()
+        await mongo_client.admin.command("ping")
+    logger.info(
+        "Connected to MongoDB (maxPoolSize=%d, %d dedicated tenant databases)",
+        MONGO_MAX_POOL_SIZE, len(tenant_router.databases()) - 1,
+    )
+    for database in tenant_router.databases():
+        await ensure_indexes(database)
+    await search_backend.start()
+    await visitor_events.start()
+    scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await visitor_events.stop()
+        for mongo_client in tenant_router.clients.values():
+            await mongo_client.close()
+        logger.info("MongoDB connection pools closed")
+        password_executor.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(lifespan=lifespan, default_response_class=BSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -31,16 +459,85 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
-# MongoDB setup
-client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
-db = client["esocietydb"]
-users_collection = db["users"]
-complaints_collection = db["complaints"]
-bookings_collection = db["bookings"]
-visitors_collection = db["visitors"]
-facilities_collection = db["facilities"]
+class RequestMetricsMiddleware:
+    """Records per-request metrics and the request log line.
+
+    Plain ASGI rather than @app.middleware("http"): that returns as soon as headers are sent, so a
+    streamed export or event stream would be measured, and leave the in-flight gauge, before its
+    body (and the cursor reads behind it) had gone out. Here the bookkeeping runs once the app
+    returns, after the last body message.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Honour a caller's correlation id so logs line up across services
+        request_id = Headers(scope=scope).get("x-request-id", "")
+        if not REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        request_id_var.set(request_id)
+        commands = []
+        token = request_db_commands.set(commands)
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        status_code = 500
+        content_length = None
+
+        async def send_with_request_id(message):
+            nonlocal status_code, content_length
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                content_length = headers.get("content-length")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            request_db_commands.reset(token)
+            method = scope["method"]
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            db_seconds = sum(seconds for _, seconds in commands)
+            http_requests_total.inc((method, route, str(status_code)))
+            http_request_duration.observe((method, route), elapsed)
+            http_request_db_commands.observe((route,), len(commands))
+            http_request_db_duration.observe((route,), db_seconds)
+            if status_code != 500 and content_length is not None:
+                http_response_size.observe((route,), int(content_length))
+            if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                logger.warning(
+                    "Slow request %s %s", method, route,
+                    extra={
+                        "duration_ms": round(elapsed * 1000, 1),
+                        "db_ms": round(db_seconds * 1000, 1),
+                        "db_commands": [(name, round(seconds * 1000, 2)) for name, seconds in commands],
+                    },
+                )
+            else:
+                log_sampled(
+                    "Request %s %s", method, route,
+                    status=status_code, duration_ms=round(elapsed * 1000, 1), db_command_count=len(commands),
+                )
+
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 # JWT setup
 SECRET_KEY = os.getenv("SECRET_KEY", "1710")  # Use environment variable
@@ -50,9 +547,127 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt runs on a bounded worker pool so it never blocks the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+pending_password_jobs = 0
+
+# Login rate limiting
+# Only failed attempts count, so a burst of legitimate logins is never throttled
+LOGIN_RATE_LIMIT_ATTEMPTS = int(os.getenv("LOGIN_RATE_LIMIT_ATTEMPTS", "10"))  # Per account
+LOGIN_RATE_LIMIT_IP_ATTEMPTS = int(os.getenv("LOGIN_RATE_LIMIT_IP_ATTEMPTS", "50"))  # Per client address; 0 disables
+LOGIN_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", "60"))
+# Reverse proxies whose X-Forwarded-For is believed, e.g. "127.0.0.1,10.0.0.0/8"
+TRUSTED_PROXIES = [ipaddress.ip_network(part.strip()) for part in os.getenv("TRUSTED_PROXIES", "").split(",") if part.strip()]
+
+class RateLimiter:
+    """Sliding-window limiter allowing max_attempts per key within window seconds."""
+
+    def __init__(self, max_attempts: int, window: float, max_keys: int = 100000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._attempts: Dict[str, deque] = {}
+
+    def allowed(self, key: str) -> bool:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return True
+        cutoff = time.monotonic() - self.window
+        while attempts and attempts[0] <= cutoff:
+            attempts.popleft()
+        return len(attempts) < self.max_attempts
+
+    def record(self, key: str):
+        now = time.monotonic()
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            if len(self._attempts) >= self.max_keys:
+                self._sweep(now)
+            attempts = self._attempts[key] = deque()
+        attempts.append(now)
+
+    def _sweep(self, now: float):
+        cutoff = now - self.window
+        for key in [k for k, v in self._attempts.items() if not v or v[-1] <= cutoff]:
+            del self._attempts[key]
+
+login_rate_limiter = RateLimiter(LOGIN_RATE_LIMIT_ATTEMPTS, LOGIN_RATE_LIMIT_WINDOW_SECONDS)
+ip_login_rate_limiter = RateLimiter(LOGIN_RATE_LIMIT_IP_ATTEMPTS, LOGIN_RATE_LIMIT_WINDOW_SECONDS)
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def client_ip(request: Request) -> str:
+    """The caller's address; X-Forwarded-For is only read when a trusted proxy sent the request."""
+    address = request.client.host if request.client else "unknown"
+    if not is_trusted_proxy(address):
+        return address
+    # Walk right to left: each trusted hop vouches for the address it received from
+    for hop in reversed([part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]):
+        address = hop
+        if not is_trusted_proxy(hop):
+            break
+    return address
+
 # OAuth2 setup
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+OBJECT_ID_RE = re.compile(r"^[0-9a-fA-F]{24}$")
+
+# Authenticated user cache
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+class UserCache:
+    """In-process TTL/LRU cache of user documents keyed by user id."""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, user_id: str):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, user_id: str, user: dict):
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+        }
+
+user_cache = UserCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE)
+
+def user_cache_key(user_id: str) -> str:
+    return f"{current_society_id()}:{user_id}"
+
 # Pydantic models
 class RegisterUser(BaseModel):
     email: str
@@ -73,10 +688,67 @@ class ComplaintCreate(BaseModel):
 class BookingCreate(BaseModel):
     facility_id: str
     slot: str
+    booking_date: Optional[date] = None  # Defaults to today
 
 class VisitorCreate(BaseModel):  # Added for input validation
     name: str
     purpose: str
+    resident_id: Optional[str] = None  # Either the resident's ID or their flat (address)
+    flat: Optional[str] = None
+
+# Response models. Endpoints return BSONResponse directly, so FastAPI never validates against
+# these; list endpoints read through model_projection() so the stored fields cannot drift from them
+class MongoDocument(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    id: str = Field(alias="_id")
+
+class UserOut(MongoDocument):
+    email: str
+    role: str
+    name: str
+    phone: str
+    address: str
+
+class ComplaintOut(MongoDocument):
+    title: str
+    description: str
+    status: str
+    resident_id: str
+    created_at: datetime
+    resolved_at: Optional[datetime] = None
+
+class FacilityOut(MongoDocument):
+    name: str
+    available_slots: List[str]
+
+class BookingOut(MongoDocument):
+    facility_id: Optional[str] = None
+    facility_name: str
+    slot: str
+    booking_date: Optional[str] = None
+    resident_id: Optional[str] = None
+    booked_at: str
+
+class VisitorOut(MongoDocument):
+    name: str
+    purpose: str
+    resident_id: Optional[str] = None  # None for legacy visitors nobody can be attributed to
+    flat: Optional[str] = None
+    status: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class ComplaintPage(BaseModel):
+    items: List[ComplaintOut]
+    next_cursor: Optional[str]
+
+class BookingPage(BaseModel):
+    items: List[BookingOut]
+    next_cursor: Optional[str]
+
+class VisitorPage(BaseModel):
+    items: List[VisitorOut]
+    next_cursor: Optional[str]
 
 # Helper functions
 def verify_password(plain_password, hashed_password):
@@ -85,14 +757,821 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def create_access_token(data: dict):
+def validate_password(password: str) -> Optional[str]:
+    if len(password) < 8:
+        return "Password must be at least 8 characters long"
+    if not re.search(r"[A-Za-z]", password) or not re.search(r"\d", password):
+        return "Password must contain both letters and numbers"
+    return None
+
+async def run_password_job(func, *args):
+    # Shed load with 429 instead of queueing unbounded bcrypt work
+    global pending_password_jobs
+    if pending_password_jobs >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many authentication requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    pending_password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        pending_password_jobs -= 1
+
+def create_access_token(data: dict, expires: Optional[timedelta] = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + (expires or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Pagination
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+def model_projection(model: type) -> Dict[str, int]:
+    """Mongo projection of exactly the fields a response model declares (_id is always returned)."""
+    return {field.alias or name: 1 for name, field in model.model_fields.items() if (field.alias or name) != "_id"}
+
+USER_PROJECTION = model_projection(UserOut)
+FACILITY_PROJECTION = model_projection(FacilityOut)
+COMPLAINT_LIST_PROJECTION = model_projection(ComplaintOut)
+BOOKING_LIST_PROJECTION = model_projection(BookingOut)
+VISITOR_LIST_PROJECTION = model_projection(VisitorOut)
+
+async def ensure_indexes(database):
+    # Every index leads with society_id, so a tenant's queries only ever walk its own keys
+    complaints, bookings, visitors = database["complaints"], database["bookings"], database["visitors"]
+    users, facilities = database["users"], database["facilities"]
+    # Keyset pagination walks _id descending, optionally within a status
+    await complaints.create_index([("society_id", 1), ("_id", -1)])
+    await complaints.create_index([("society_id", 1), ("status", 1), ("_id", -1)])
+    await complaints.create_index([("society_id", 1), ("created_at", -1)])
+    await complaints.create_index([("society_id", 1), ("resident_id", 1)])
+    await bookings.create_index([("society_id", 1), ("_id", -1)])
+    await bookings.create_index([("society_id", 1), ("booked_at", -1)])
+    await bookings.create_index([("society_id", 1), ("resident_id", 1)])
+    # A slot can be claimed once per facility per day; legacy bookings have no booking_date
+    await bookings.create_index(
+        [("society_id", 1), ("facility_id", 1), ("booking_date", 1), ("slot", 1)],
+        unique=True,
+        partialFilterExpression={"booking_date": {"$exists": True}},
+    )
+    await visitors.create_index([("society_id", 1), ("_id", -1)])
+    await visitors.create_index([("society_id", 1), ("status", 1), ("_id", -1)])
+    await visitors.create_index([("society_id", 1), ("resident_id", 1), ("status", 1), ("created_at", -1)])
+    await visitors.create_index([("society_id", 1), ("created_at", -1)])
+    await users.create_index([("society_id", 1), ("address", 1), ("role", 1)])
+    # Emails are unique within a society; one person may live in several
+    await users.create_index([("society_id", 1), ("email", 1)], unique=True)
+    await facilities.create_index([("society_id", 1), ("name", 1)])
+    await database["catalog_versions"].create_index([("society_id", 1)], unique=True)
+    # Archives expire on their own once past retention
+    for kind in ("visitors", "bookings"):
+        archive = database[f"{kind}_archive"]
+        if ARCHIVE_RETENTION_DAYS:
+            ttl_seconds = ARCHIVE_RETENTION_DAYS * 86400
+            try:
+                await archive.create_index([("archived_at", 1)], expireAfterSeconds=ttl_seconds)
+            except OperationFailure:
+                # Retention changed since the index was built; update it in place
+                await database.command("collMod", archive.name, index={"keyPattern": {"archived_at": 1}, "expireAfterSeconds": ttl_seconds})
+        await archive.create_index([("society_id", 1), ("created_at" if kind == "visitors" else "booked_at", -1)])
+    # Full-text search; names and titles outrank free text. The society_id prefix
+    # restricts each search to one tenant's postings
+    await complaints.create_index(
+        [("society_id", 1), ("title", "text"), ("description", "text")],
+        weights={"title": 3, "description": 1}, name="complaints_society_text",
+    )
+    await visitors.create_index(
+        [("society_id", 1), ("name", "text"), ("purpose", "text")],
+        weights={"name": 3, "purpose": 1}, name="visitors_society_text",
+    )
+
+def date_range_filter(date_from: Optional[date], date_to: Optional[date]) -> Dict[str, Any]:
+    # Both bounds are inclusive calendar days
+    date_filter = {}
+    if date_from:
+        date_filter["$gte"] = datetime.combine(date_from, dt_time.min)
+    if date_to:
+        date_filter["$lt"] = datetime.combine(date_to + timedelta(days=1), dt_time.min)
+    return date_filter
+
+def day_string_range_filter(date_from: Optional[date], date_to: Optional[date]) -> Dict[str, Any]:
+    # For fields stored as YYYY-MM-DD strings, which sort chronologically
+    date_filter = {}
+    if date_from:
+        date_filter["$gte"] = date_from.isoformat()
+    if date_to:
+        date_filter["$lte"] = date_to.isoformat()
+    return date_filter
+
+async def paginate(collection, query: dict, limit: int, after: Optional[str], projection: dict) -> BSONResponse:
+    if after is not None:
+        if not OBJECT_ID_RE.match(after):
+            raise HTTPException(status_code=400, detail="Cursor must be a 24-character hexadecimal string")
+        query["_id"] = {"$lt": ObjectId(after)}
+    # Fetch one extra document to know whether another page exists
+    docs = await collection.find(query, projection).sort("_id", -1).limit(limit + 1).to_list(None)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    return BSONResponse({"items": docs, "next_cursor": str(docs[-1]["_id"]) if has_more else None})
+
+# Admin dashboard stats
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "5"))
+stats_cache: Dict[str, Dict[str, Any]] = {}  # society_id -> {"value", "expires_at", "version"}
+
+def stats_cache_entry(society_id: str) -> Dict[str, Any]:
+    return stats_cache.setdefault(society_id, {"value": None, "expires_at": 0.0, "version": 0})
+
+def invalidate_stats_cache():
+    society_id = current_society.get()
+    # Background jobs run outside any society and may have touched all of them
+    entries = list(stats_cache.values()) if society_id is None else [stats_cache_entry(society_id)]
+    for entry in entries:
+        entry["value"] = None
+        entry["version"] += 1
+
+async def count_by_field(collection, field: str) -> Dict[str, int]:
+    cursor = await collection.aggregate([{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}])
+    return {str(group["_id"]): group["count"] async for group in cursor}
+
+# Visitor event stream
+VISITOR_EVENT_BROKER = os.getenv("VISITOR_EVENT_BROKER", "local")  # "local" or "mongo"
+VISITOR_EVENT_QUEUE_SIZE = int(os.getenv("VISITOR_EVENT_QUEUE_SIZE", "100"))
+VISITOR_EVENT_HEARTBEAT_SECONDS = float(os.getenv("VISITOR_EVENT_HEARTBEAT_SECONDS", "15"))
+VISITOR_EVENT_CAPPED_SIZE_BYTES = int(os.getenv("VISITOR_EVENT_CAPPED_SIZE_BYTES", str(16 * 1024 * 1024)))
+VISITOR_EVENT_TICKET_SECONDS = int(os.getenv("VISITOR_EVENT_TICKET_SECONDS", "60"))
+VISITOR_EVENT_TICKET_PURPOSE = "visitor-events"
+VISITOR_EVENT_MAX_GAP = int(os.getenv("VISITOR_EVENT_MAX_GAP", "1000"))  # Missing seqs tolerated before skipping past them
+
+class LocalEventBroker:
+    """Delivers events only to subscribers in this worker process."""
+
+    def __init__(self):
+        self._deliver = lambda event: None
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    async def publish(self, event: dict):
+        self._deliver(event)
+
+    async def stop(self):
+        pass
+
+class MongoEventBroker:
+    """Fans events out across workers through a tailable capped collection.
+
+    ObjectIds from different workers are not ordered, so every event carries a number from a
+    shared counter and a tail that has to reopen resumes from the highest contiguous one seen.
+    """
+
+    def __init__(self, name: str, counters_name: str, size_bytes: int):
+        self.name = name
+        self.counters_name = counters_name
+        self.size_bytes = size_bytes
+        self._task = None
+        self._watermark = 0  # Every seq at or below this has been delivered
+        self._seen: set = set()  # Delivered seqs above the watermark, waiting on a gap
+
+    async def start(self, deliver):
+        try:
+            await db.create_collection(self.name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass  # Already created by another worker
+        latest = await db[self.name].find_one({"seq": {"$exists": True}}, {"seq": 1}, sort=[("$natural", -1)])
+        self._watermark = latest["seq"] if latest else 0
+        self._task = asyncio.create_task(self._tail(deliver))
+
+    def _claim(self, seq: int) -> bool:
+        """Marks seq delivered; False if it already was (replayed after a reopen)."""
+        if seq <= self._watermark or seq in self._seen:
+            return False
+        self._seen.add(seq)
+        if len(self._seen) > VISITOR_EVENT_MAX_GAP:
+            # A publisher died between taking a number and inserting; stop waiting for it
+            self._watermark = min(self._seen) - 1
+        while self._watermark + 1 in self._seen:
+            self._watermark += 1
+            self._seen.discard(self._watermark)
+        return True
+
+    async def _tail(self, deliver):
+        while True:
+            # Natural order is insertion order; seq only filters what was already delivered
+            cursor = db[self.name].find({"seq": {"$gt": self._watermark}}, cursor_type=CursorType.TAILABLE_AWAIT)
+            try:
+                # An empty await batch ends the inner loop but leaves the cursor open
+                while cursor.alive:
+                    async for doc in cursor:
+                        if self._claim(doc["seq"]):
+                            doc.pop("_id")
+                            doc.pop("seq")
+                            deliver(doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Visitor event tail failed: %s", e)
+            finally:
+                await cursor.close()
+            # Only reached when the cursor died: empty collection, overrun by the capped window, or an error
+            await asyncio.sleep(1)
+
+    async def publish(self, event: dict):
+        counter = await db[self.counters_name].find_one_and_update(
+            {"_id": self.name}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        await db[self.name].insert_one({**event, "seq": counter["seq"]})
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+class Subscription:
+    def __init__(self, society_id: str, role: str, user_id: str, queue_size: int):
+        self.society_id = society_id
+        self.role = role
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+class VisitorEventBus:
+    """Role/resident-scoped pub/sub for visitor lifecycle events."""
+
+    def __init__(self, broker, queue_size: int):
+        self.broker = broker
+        self.queue_size = queue_size
+        self.subscribers: set = set()
+
+    async def start(self):
+        await self.broker.start(self._deliver)
+
+    async def stop(self):
+        await self.broker.stop()
+
+    def subscribe(self, user: dict) -> Subscription:
+        subscription = Subscription(current_society_id(), user["role"], str(user["_id"]), self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    async def publish(self, event_type: str, visitor: dict):
+        event = {"type": event_type, "visitor": visitor, "at": datetime.utcnow()}
+        try:
+            await self.broker.publish(event)
+        except Exception as e:
+            # Losing a live update must never fail the write that triggered it
+            logger.error("Failed to publish visitor event: %s", e)
+
+    def _deliver(self, event: dict):
+        for subscription in list(self.subscribers):
+            if not self._can_see(subscription, event["visitor"]):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it so it reconnects and refetches
+                subscription.overflowed = True
+                self.subscribers.discard(subscription)
+
+    @staticmethod
+    def _can_see(subscription: Subscription, visitor: dict) -> bool:
+        if visitor.get("society_id") != subscription.society_id:
+            return False
+        if subscription.role in ("admin", "security"):
+            return True
+        return subscription.role == "resident" and visitor.get("resident_id") == subscription.user_id
+
+visitor_events = VisitorEventBus(
+    MongoEventBroker("visitor_events", "counters", VISITOR_EVENT_CAPPED_SIZE_BYTES) if VISITOR_EVENT_BROKER == "mongo" else LocalEventBroker(),
+    VISITOR_EVENT_QUEUE_SIZE,
+)
+
+VISITOR_EVENT_TYPES = {
+    "approve": "visitor.approved",
+    "deny": "visitor.denied",
+    "entered": "visitor.entered",
+    "exited": "visitor.exited",
+}
+
+# Facilities catalog cache
+# Each society's catalog version lives in Mongo and every facility write bumps it, so a worker
+# notices another worker's write within FACILITIES_VERSION_CHECK_SECONDS
+FACILITIES_MAX_AGE_SECONDS = int(os.getenv("FACILITIES_MAX_AGE_SECONDS", "0"))
+FACILITIES_VERSION_CHECK_SECONDS = float(os.getenv("FACILITIES_VERSION_CHECK_SECONDS", "2"))
+facilities_cache: Dict[str, Dict[str, Any]] = {}  # society_id -> {"body", "version", "checked_at"}
+
+def facilities_cache_entry(society_id: str) -> Dict[str, Any]:
+    return facilities_cache.setdefault(society_id, {"body": None, "version": None, "checked_at": float("-inf")})
+
+def facilities_etag(society_id: str, version: int) -> str:
+    return f'"{society_id}-{version}"'
+
+async def facilities_catalog_version(cache: Dict[str, Any]) -> int:
+    """The society's catalog version, re-read from Mongo at most once per check interval."""
+    now = time.monotonic()
+    if now - cache["checked_at"] >= FACILITIES_VERSION_CHECK_SECONDS:
+        doc = await catalog_versions_collection.find_one({}, {"facilities": 1})
+        version = doc.get("facilities", 0) if doc else 0
+        if version != cache["version"]:
+            cache["body"], cache["version"] = None, version
+        cache["checked_at"] = now
+    return cache["version"]
+
+async def invalidate_facilities_cache():
+    doc = await catalog_versions_collection.find_one_and_update(
+        {}, {"$inc": {"facilities": 1}}, projection={"facilities": 1}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    # This worker sees its own write at once; the others on their next version check
+    cache = facilities_cache_entry(current_society_id())
+    cache["body"], cache["version"], cache["checked_at"] = None, doc["facilities"], time.monotonic()
+
+# Single-round-trip mutations
+# Security may only move a visitor forward: approved -> entered -> exited
+VISITOR_STATUS_TRANSITIONS = {"entered": "approve", "exited": "entered"}
+
+async def mutate_one(
+    collection,
+    doc_id: str,
+    label: str,
+    update: Optional[dict] = None,
+    scope: Optional[dict] = None,
+    conditions: Optional[dict] = None,
+    projection: Optional[dict] = None,
+):
+    """Atomically update (or, without an update, delete) one document by id.
+
+    scope narrows which documents the caller may touch (misses are 404);
+    conditions guard the current state (misses on an existing document are 409).
+    Returns the updated document, or the deleted one.
+    """
+    if not OBJECT_ID_RE.match(doc_id):
+        raise HTTPException(status_code=400, detail=f"{label} ID must be a 24-character hexadecimal string")
+    query = {"_id": ObjectId(doc_id), **(scope or {})}
+    guarded_query = {**query, **(conditions or {})}
+    if update is None:
+        doc = await collection.find_one_and_delete(guarded_query, projection=projection)
+    else:
+        doc = await collection.find_one_and_update(
+            guarded_query, update, projection=projection, return_document=ReturnDocument.AFTER
+        )
+    if doc is not None:
+        return doc
+    # Only failed guarded writes pay for a second lookup, to tell 404 from 409
+    if conditions and await collection.find_one(query, {"_id": 1}):
+        raise HTTPException(status_code=409, detail=f"{label} cannot be changed from its current state")
+    raise HTTPException(status_code=404, detail=f"{label} not found")
+
+# History export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORTS = {
+    "visitors": (
+        "visitors", "created_at",
+        ["_id", "name", "purpose", "flat", "resident_id", "status", "created_at", "handled_at", "updated_at"],
+    ),
+    "bookings": (
+        "bookings", "booked_at",
+        ["_id", "facility_id", "facility_name", "slot", "booking_date", "resident_id", "booked_at"],
+    ),
+    "complaints": (
+        "complaints", "created_at",
+        ["_id", "title", "description", "status", "resident_id", "created_at", "resolved_at"],
+    ),
+}
+
+async def export_csv_rows(cursor, columns: List[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for doc in cursor:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (doc.get(column) for column in columns)
+        ])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+async def export_ndjson_rows(cursor, columns: List[str]):
+    chunk = bytearray()
+    async for doc in cursor:
+        chunk += dumps_bson({column: doc.get(column) for column in columns})
+        chunk += b"\n"
+        if len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    yield bytes(chunk)
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+# Search
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "mongo")  # "mongo" or "memory"
+MAX_SEARCH_OFFSET = 1000
+SEARCH_FIELDS = {
+    "complaints": {"title": 3, "description": 1},
+    "visitors": {"name": 3, "purpose": 1},
+}
+SEARCH_PROJECTIONS = {
+    "complaints": COMPLAINT_LIST_PROJECTION,
+    "visitors": VISITOR_LIST_PROJECTION,
+}
+TOKEN_RE = re.compile(r"\w+")
+
+class MongoTextSearchBackend:
+    """Ranks with MongoDB text indexes; nothing to maintain in process."""
+
+    async def start(self):
+        pass
+
+    def index(self, kind: str, doc: dict):
+        pass
+
+    def remove(self, kind: str, doc_id: str):
+        pass
+
+    async def search(self, kind: str, text: str, query: dict, limit: int) -> List[dict]:
+        projection = {**SEARCH_PROJECTIONS[kind], "score": {"$meta": "textScore"}}
+        cursor = TenantCollection(kind).find({"$text": {"$search": text}, **query}, projection)
+        return await cursor.sort([("score", {"$meta": "textScore"})]).limit(limit).to_list(None)
+
+class InMemorySearchBackend:
+    """Per-process inverted index, for deployments or tests without Mongo text search."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[tuple, float]] = {}
+        self.docs: Dict[tuple, dict] = {}
+        self.terms: Dict[tuple, set] = {}
+        self.societies: Dict[tuple, str] = {}
+
+    async def start(self):
+        for database in tenant_router.databases():
+            for kind, projection in SEARCH_PROJECTIONS.items():
+                async for doc in database[kind].find({}, {**projection, "society_id": 1}):
+                    self.index(kind, doc)
+
+    def index(self, kind: str, doc: dict):
+        key = (kind, str(doc["_id"]))
+        self._remove(key)
+        weights: Dict[str, float] = {}
+        for field, weight in SEARCH_FIELDS[kind].items():
+            for token in TOKEN_RE.findall(str(doc.get(field) or "").lower()):
+                weights[token] = weights.get(token, 0) + weight
+        for token, weight in weights.items():
+            self.postings.setdefault(token, {})[key] = weight
+        self.terms[key] = set(weights)
+        self.docs[key] = {field: doc.get(field) for field in ("_id", *SEARCH_PROJECTIONS[kind])}
+        self.societies[key] = doc.get("society_id")
+
+    def remove(self, kind: str, doc_id: str):
+        self._remove((kind, doc_id))
+
+    def _remove(self, key: tuple):
+        for token in self.terms.pop(key, ()):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[token]
+        self.docs.pop(key, None)
+        self.societies.pop(key, None)
+
+    async def search(self, kind: str, text: str, query: dict, limit: int) -> List[dict]:
+        society_id = current_society_id()
+        scores: Dict[tuple, float] = {}
+        for token in set(TOKEN_RE.findall(text.lower())):
+            postings = self.postings.get(token, {})
+            # Rarer terms count for more, as with tf-idf
+            idf = 1 + len(self.docs) / (1 + len(postings))
+            for key, weight in postings.items():
+                if key[0] == kind and self.societies[key] == society_id:
+                    scores[key] = scores.get(key, 0) + weight * idf
+        results = []
+        for key, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            doc = self.docs[key]
+            if self._matches(doc, query):
+                results.append({**doc, "score": score})
+                if len(results) >= limit:
+                    break
+        return results
+
+    @staticmethod
+    def _matches(doc: dict, query: dict) -> bool:
+        if "status" in query and doc.get("status") != query["status"]:
+            return False
+        created_at = query.get("created_at")
+        if created_at:
+            value = doc.get("created_at")
+            if value is None:
+                return False
+            if "$gte" in created_at and value < created_at["$gte"]:
+                return False
+            if "$lt" in created_at and value >= created_at["$lt"]:
+                return False
+        return True
+
+search_backend = InMemorySearchBackend() if SEARCH_BACKEND == "memory" else MongoTextSearchBackend()
+
+# Background jobs
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "60"))
+VISITOR_RETENTION_DAYS = int(os.getenv("VISITOR_RETENTION_DAYS", "90"))
+BOOKING_RETENTION_DAYS = int(os.getenv("BOOKING_RETENTION_DAYS", "30"))
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "730"))  # 0 keeps archives forever
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", str(24 * 3600)))
+
+class Scheduler:
+    """Runs periodic jobs; a lease document per job keeps workers from running it twice."""
+
+    def __init__(self, leases_collection_name: str, poll_seconds: float):
+        self.leases_collection_name = leases_collection_name
+        self.poll_seconds = poll_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.jobs: List[tuple] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def job(self, name: str, interval_seconds: float):
+        def register(func):
+            self.jobs.append((name, interval_seconds, func))
+            return func
+        return register
+
+    def start(self):
+        if not SCHEDULER_ENABLED:
+            return
+        self._tasks = [asyncio.create_task(self._run(*job)) for job in self.jobs]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self, name: str, interval_seconds: float) -> bool:
+        # The lease doubles as the schedule: it is held until the next run is due
+        now = datetime.utcnow()
+        try:
+            await db[self.leases_collection_name].find_one_and_update(
+                {"_id": name, "locked_until": {"$lte": now}},
+                {"$set": {"locked_until": now + timedelta(seconds=interval_seconds), "owner": self.owner, "started_at": now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False  # Another worker holds the lease
+        return True
+
+    async def _run(self, name: str, interval_seconds: float, func):
+        # Jitter the first poll so workers started together don't all race
+        await asyncio.sleep(random.uniform(0, min(self.poll_seconds, 5)))
+        while True:
+            try:
+                if await self._claim(name, interval_seconds):
+                    started = time.perf_counter()
+                    result = await func()
+                    logger.info("Job %s finished in %.1fs: %s", name, time.perf_counter() - started, result)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job %s failed", name)
+            await asyncio.sleep(self.poll_seconds)
+
+scheduler = Scheduler("scheduler_leases", SCHEDULER_POLL_SECONDS)
+
+async def archive_in_batches(database, kind: str, query: dict) -> int:
+    """Move matching documents into <kind>_archive, oldest first, one batch at a time."""
+    source = database[kind]
+    archive = database[f"{kind}_archive"]
+    # Retention is the same for every society, so one pass covers the whole database
+    projection = {column: 1 for column in [*EXPORTS[kind][2], "society_id"]}
+    moved = 0
+    while True:
+        batch = await source.find(query, projection).sort("_id", 1).limit(ARCHIVE_BATCH_SIZE).to_list(None)
+        if not batch:
+            return moved
+        archived_at = datetime.utcnow()
+        # Compact: keep only the exported columns and drop empty fields
+        docs = [{**{k: v for k, v in doc.items() if v is not None}, "archived_at": archived_at} for doc in batch]
+        try:
+            await archive.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # A previous run may have copied part of this batch before being interrupted
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+        ids = [doc["_id"] for doc in batch]
+        await source.delete_many({"_id": {"$in": ids}})
+        for doc_id in ids:
+            search_backend.remove(kind, str(doc_id))
+        moved += len(batch)
+        invalidate_stats_cache()
+
+@scheduler.job("archive_visitors", ARCHIVE_INTERVAL_SECONDS)
+async def archive_old_visitors():
+    cutoff = datetime.utcnow() - timedelta(days=VISITOR_RETENTION_DAYS)
+    archived = 0
+    for database in tenant_router.databases():
+        archived += await archive_in_batches(database, "visitors", {"created_at": {"$lt": cutoff}})
+    return {"archived": archived}
+
+@scheduler.job("archive_bookings", ARCHIVE_INTERVAL_SECONDS)
+async def archive_old_bookings():
+    # Removing past days' bookings also frees their date-scoped slot claims from the hot index
+    cutoff = (datetime.utcnow().date() - timedelta(days=BOOKING_RETENTION_DAYS)).isoformat()
+    query = {"$or": [
+        {"booking_date": {"$lt": cutoff}},
+        {"booking_date": {"$exists": False}, "booked_at": {"$lt": cutoff}},
+    ]}
+    archived = restored = 0
+    for database in tenant_router.databases():
+        restored += await restore_legacy_slots(database, {"booking_date": {"$exists": False}, "booked_at": {"$lt": cutoff}})
+        archived += await archive_in_batches(database, "bookings", query)
+    return {"archived": archived, "restored_slots": restored}
+
+async def restore_legacy_slots(database, query: dict) -> int:
+    """Put the slots of date-less legacy bookings back into their facility templates.
+
+    Those bookings $pull'ed their slot when made; cancel_booking restores it, but archiving
+    would otherwise remove the booking and lose the slot for good. $addToSet keeps this
+    idempotent, so a run interrupted before archiving is safe to repeat.
+    """
+    pipeline = [
+        {"$match": query},
+        {"$group": {"_id": {"society_id": "$society_id", "facility_id": "$facility_id"}, "slots": {"$addToSet": "$slot"}}},
+    ]
+    restored = 0
+    changed_societies = set()
+    async for group in await database["bookings"].aggregate(pipeline):
+        society_id, facility_id = group["_id"].get("society_id"), group["_id"].get("facility_id")
+        if not isinstance(facility_id, str) or not OBJECT_ID_RE.match(facility_id):
+            continue
+        result = await database["facilities"].update_one(
+            {"_id": ObjectId(facility_id), "society_id": society_id},
+            {"$addToSet": {"available_slots": {"$each": group["slots"]}}},
+        )
+        if result.modified_count:
+            restored += len(group["slots"])
+            changed_societies.add(society_id)
+    for society_id in changed_societies:
+        token = current_society.set(society_id)
+        try:
+            await invalidate_facilities_cache()
+        finally:
+            current_society.reset(token)
+    return restored
+
+# Bulk import
+MAX_IMPORT_ROWS = int(os.getenv("MAX_IMPORT_ROWS", "5000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MODELS = {"users": RegisterUser, "facilities": FacilityCreate, "visitors": VisitorCreate}
+
+async def read_import_rows(request: Request, kind: str) -> List[dict]:
+    """Parse a JSON array or a CSV body (by Content-Type) into row dicts."""
+    content_type = request.headers.get("content-type", "")
+    body = await request.body()
+    if "csv" in content_type:
+        try:
+            rows = list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+        if kind == "facilities":
+            # Slots share one CSV column, separated by semicolons
+            for row in rows:
+                row["available_slots"] = [slot.strip() for slot in (row.get("available_slots") or "").split(";") if slot.strip()]
+        rows = [{key: value for key, value in row.items() if value not in ("", None)} for row in rows]
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} rows per import")
+    return rows
+
+def validate_import_rows(kind: str, rows: List[dict], errors: List[dict]) -> List[tuple]:
+    model = IMPORT_MODELS[kind]
+    valid = []
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            item = model.model_validate(row)
+        except ValidationError as e:
+            first = e.errors()[0]
+            errors.append({"row": row_number, "error": f"{'.'.join(map(str, first['loc']))}: {first['msg']}"})
+            continue
+        valid.append((row_number, item))
+    return valid
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    # Feed the pool a few hashes at a time so logins can interleave with a large import
+    loop = asyncio.get_running_loop()
+    hashes = []
+    for i in range(0, len(passwords), PASSWORD_HASH_WORKERS):
+        chunk = passwords[i:i + PASSWORD_HASH_WORKERS]
+        hashes.extend(await asyncio.gather(*(
+            loop.run_in_executor(password_executor, get_password_hash, password) for password in chunk
+        )))
+    return hashes
+
+async def prepare_users(batch: List[tuple], errors: List[dict]) -> List[tuple]:
+    existing = {
+        user["email"]
+        for user in await users_collection.find({"email": {"$in": [item.email for _, item in batch]}}, {"email": 1}).to_list(None)
+    }
+    accepted, seen = [], set()
+    for row_number, item in batch:
+        error = validate_password(item.password)
+        if item.email in existing or item.email in seen:
+            error = "Email already registered"
+        if error:
+            errors.append({"row": row_number, "error": error})
+            continue
+        seen.add(item.email)
+        accepted.append((row_number, item))
+    hashes = await hash_passwords([item.password for _, item in accepted])
+    return [
+        (row_number, {
+            "email": item.email,
+            "hashed_password": hashed_password,
+            "role": item.role,
+            "name": item.name,
+            "phone": item.phone,
+            "address": item.address,
+        })
+        for (row_number, item), hashed_password in zip(accepted, hashes)
+    ]
+
+async def prepare_facilities(batch: List[tuple], errors: List[dict]) -> List[tuple]:
+    prepared = []
+    for row_number, item in batch:
+        if not item.available_slots:
+            errors.append({"row": row_number, "error": "At least one slot is required"})
+            continue
+        prepared.append((row_number, {"name": item.name, "available_slots": item.available_slots}))
+    return prepared
+
+async def prepare_visitors(batch: List[tuple], errors: List[dict]) -> List[tuple]:
+    # Resolve every resident reference in the batch with one query
+    ids = [ObjectId(item.resident_id) for _, item in batch if item.resident_id and OBJECT_ID_RE.match(item.resident_id)]
+    flats = [item.flat for _, item in batch if not item.resident_id and item.flat]
+    residents = await users_collection.find(
+        {"role": "resident", "$or": [{"_id": {"$in": ids}}, {"address": {"$in": flats}}]}, {"address": 1}
+    ).to_list(None)
+    by_id = {str(resident["_id"]): resident for resident in residents}
+    by_flat = {resident.get("address"): resident for resident in residents}
+    now = datetime.utcnow()
+    prepared = []
+    for row_number, item in batch:
+        resident = by_id.get(item.resident_id) if item.resident_id else by_flat.get(item.flat)
+        if resident is None:
+            errors.append({"row": row_number, "error": "Resident not found" if item.resident_id or item.flat else "Either resident_id or flat is required"})
+            continue
+        # Pre-registered visitors are already approved by their host
+        prepared.append((row_number, {
+            "name": item.name,
+            "purpose": item.purpose,
+            "resident_id": str(resident["_id"]),
+            "flat": resident.get("address"),
+            "status": "approve",
+            "created_at": now,
+            "handled_at": now,
+        }))
+    return prepared
+
+IMPORT_PREPARERS = {"users": prepare_users, "facilities": prepare_facilities, "visitors": prepare_visitors}
+
+async def insert_import_batch(collection, prepared: List[tuple], errors: List[dict]) -> List[dict]:
+    if not prepared:
+        return []
+    docs = [doc for _, doc in prepared]
+    try:
+        await collection.insert_many(docs, ordered=False)
+        return docs
+    except BulkWriteError as e:
+        # Unordered writes keep going; map each failure back to its source row
+        failed = {error["index"] for error in e.details["writeErrors"]}
+        for error in e.details["writeErrors"]:
+            message = "Duplicate key" if error["code"] == 11000 else error["errmsg"]
+            errors.append({"row": prepared[error["index"]][0], "error": message})
+        return [doc for i, doc in enumerate(docs) if i not in failed]
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await authenticate(token)
+
+async def authenticate(token: str, purpose: Optional[str] = None):
+    """Resolves a token to its user; single-purpose tokens are only accepted for their purpose."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -101,43 +1580,76 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
-        logger.info(f"Decoded JWT token with user_id: {user_id}")
         if user_id is None:
-            logger.error("No user_id in JWT token")
+            logger.warning("Token has no subject")
+            raise credentials_exception
+        if payload.get("purpose") != purpose:
+            logger.warning("Token used outside its purpose")
             raise credentials_exception
     except JWTError as e:
-        logger.error(f"JWT decoding failed: {str(e)}")
+        logger.warning("Token rejected: %s", e)
         raise credentials_exception
     
     # Validate user_id format
-    if not re.match(r"^[0-9a-fA-F]{24}$", user_id):
-        logger.error(f"Invalid user_id format: {user_id}")
+    if not OBJECT_ID_RE.match(user_id):
+        logger.warning("Token subject is not an ObjectId")
         raise HTTPException(status_code=400, detail="User ID must be a 24-character hexadecimal string")
     
-    try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+    # Tokens issued before tenancy belong to the default society
+    society_id = payload.get("society", DEFAULT_SOCIETY_ID)
+    if not isinstance(society_id, str) or not SOCIETY_ID_RE.match(society_id):
+        logger.warning("Token has an invalid society claim")
+        raise credentials_exception
+    current_society.set(society_id)
+
+    user = user_cache.get(user_cache_key(user_id))
+    if user is None:
+        try:
+            user = await users_collection.find_one({"_id": ObjectId(user_id)})
+        except Exception:
+            logger.exception("User lookup failed")
+            raise HTTPException(status_code=400, detail="Invalid user ID format")
         if user is None:
-            logger.error(f"User not found for user_id: {user_id}")
+            logger.warning("Token subject no longer exists")
             raise credentials_exception
-        logger.info(f"User found: {user['email']}")
-    except Exception as e:
-        logger.error(f"Error querying user with user_id {user_id}: {str(e)}")
-        raise HTTPException(status_code=400, detail="Invalid user ID format")
+        user_cache.set(user_cache_key(user_id), user)
+    
+    # Tokens issued before a role change are no longer valid
+    role = payload.get("role")
+    if role is not None and role != user["role"]:
+        logger.warning("Token role claim no longer matches the user")
+        raise credentials_exception
     return user
 
+# Responses keyed by get_request_society must say so, or a cache serves one society's data to another
+REQUEST_SOCIETY_VARY = "Authorization, X-Society-ID"
+
+async def get_request_society(request: Request) -> str:
+    """Society for endpoints that also serve anonymous callers: the token's, else X-Society-ID."""
+    society_id = None
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            society_id = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("society")
+        except JWTError:
+            pass  # Anonymous access is allowed; fall back to the header
+    society_id = society_id or request.headers.get("x-society-id") or DEFAULT_SOCIETY_ID
+    if not isinstance(society_id, str) or not SOCIETY_ID_RE.match(society_id):
+        raise HTTPException(status_code=400, detail="Invalid society ID")
+    current_society.set(society_id)
+    return society_id
+
 # Endpoints
 @app.post("/register")
 async def register_user(user: RegisterUser, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can register new users")
-    if users_collection.find_one({"email": user.email}):
+    if await users_collection.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
-    # Password validation
-    if len(user.password) < 8:
-        raise HTTPException(status_code=400, detail="Password must be at least 8 characters long")
-    if not re.search(r"[A-Za-z]", user.password) or not re.search(r"\d", user.password):
-        raise HTTPException(status_code=400, detail="Password must contain both letters and numbers")
-    hashed_password = get_password_hash(user.password)
+    password_error = validate_password(user.password)
+    if password_error:
+        raise HTTPException(status_code=400, detail=password_error)
+    hashed_password = await run_password_job(get_password_hash, user.password)
     user_data = {
         "email": user.email,
         "hashed_password": hashed_password,
@@ -146,29 +1658,171 @@ async def register_user(user: RegisterUser, current_user: dict = Depends(get_cur
         "phone": user.phone,
         "address": user.address,
     }
-    result = users_collection.insert_one(user_data)
+    result = await users_collection.insert_one(user_data)
+    user_cache.invalidate(user_cache_key(str(result.inserted_id)))
     return {"message": "User registered successfully", "user_id": str(result.inserted_id)}
 
+@app.post("/api/admin/import/{kind}")
+async def bulk_import(kind: str, request: Request, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can import data")
+    if kind not in IMPORT_MODELS:
+        raise HTTPException(status_code=400, detail="Import must be one of: " + ", ".join(IMPORT_MODELS))
+    rows = await read_import_rows(request, kind)
+    errors: List[dict] = []
+    valid = validate_import_rows(kind, rows, errors)
+    collection = TenantCollection(kind)
+    inserted = 0
+    for i in range(0, len(valid), IMPORT_BATCH_SIZE):
+        prepared = await IMPORT_PREPARERS[kind](valid[i:i + IMPORT_BATCH_SIZE], errors)
+        docs = await insert_import_batch(collection, prepared, errors)
+        inserted += len(docs)
+        if kind == "visitors":
+            for doc in docs:
+                search_backend.index("visitors", doc)
+    if kind == "facilities" and inserted:
+        await invalidate_facilities_cache()
+    if kind == "visitors" and inserted:
+        invalidate_stats_cache()
+    errors.sort(key=lambda error: error["row"])
+    return {"received": len(rows), "inserted": inserted, "failed": len(errors), "errors": errors}
+
 @app.post("/login")
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    logger.info(f"Login attempt for email: {form_data.username}")
-    user = users_collection.find_one({"email": form_data.username})
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    society_id: str = Depends(get_request_society),
+):
+    limits = [(login_rate_limiter, f"email:{society_id}:{form_data.username.lower()}")]
+    if LOGIN_RATE_LIMIT_IP_ATTEMPTS:
+        limits.append((ip_login_rate_limiter, f"ip:{client_ip(request)}"))
+    if not all(limiter.allowed(key) for limiter, key in limits):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(int(LOGIN_RATE_LIMIT_WINDOW_SECONDS))},
+        )
+
+    def login_failed(reason: str) -> HTTPException:
+        for limiter, key in limits:
+            limiter.record(key)
+        # Credentials never reach the logs; the request id ties failures to the access log
+        logger.warning("Login failed", extra={"reason": reason})
+        return HTTPException(status_code=401, detail="Invalid credentials")
+
+    user = await users_collection.find_one({"email": form_data.username})
     if not user:
-        logger.error(f"User not found for email: {form_data.username}")
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    logger.info(f"User found: {user['email']}, verifying password")
-    if not verify_password(form_data.password, user["hashed_password"]):
-        logger.error(f"Password verification failed for email: {form_data.username}")
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    logger.info(f"Password verified for email: {form_data.username}")
-    access_token = create_access_token(data={"sub": str(user["_id"])})
-    logger.info(f"Generated access token for user_id: {str(user['_id'])}")
+        raise login_failed("unknown_user")
+    if not await run_password_job(verify_password, form_data.password, user["hashed_password"]):
+        raise login_failed("bad_password")
+    access_token = create_access_token(data={"sub": str(user["_id"]), "role": user["role"], "society": society_id})
+    # Prime the cache for the /me call that follows every login
+    user_cache.set(user_cache_key(str(user["_id"])), user)
+    log_sampled("Login succeeded", role=user["role"])
     return {"access_token": access_token, "token_type": "bearer"}
 
-@app.get("/me")
+@app.get("/me", response_model=UserOut)
 async def get_current_user_data(current_user: dict = Depends(get_current_user)):
-    current_user["_id"] = str(current_user["_id"])
-    return current_user
+    # The cached user is the full document; return only what UserOut declares (never the hash)
+    return BSONResponse({key: value for key, value in current_user.items() if key == "_id" or key in USER_PROJECTION})
+
+@app.get("/api/admin/stats")
+async def get_admin_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view stats")
+    cache = stats_cache_entry(current_society_id())
+    if cache["value"] is not None and cache["expires_at"] > time.monotonic():
+        return cache["value"]
+    version = cache["version"]
+    complaints, bookings, visitors = await asyncio.gather(
+        count_by_field(complaints_collection, "status"),
+        count_by_field(bookings_collection, "facility_name"),
+        count_by_field(visitors_collection, "status"),
+    )
+    stats = {
+        "complaints": {"total": sum(complaints.values()), "by_status": complaints},
+        "bookings": {"total": sum(bookings.values()), "by_facility": bookings},
+        "visitors": {"total": sum(visitors.values()), "by_status": visitors},
+    }
+    # Skip caching if a write landed while the aggregation was running
+    if version == cache["version"]:
+        cache["value"] = stats
+        cache["expires_at"] = time.monotonic() + STATS_CACHE_TTL_SECONDS
+    return stats
+
+@app.get("/api/admin/export/{kind}")
+async def export_history(
+    kind: str,
+    export_format: str = Query("csv", alias="format"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user),
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can export history")
+    if kind not in EXPORTS:
+        raise HTTPException(status_code=400, detail="Export must be one of: " + ", ".join(EXPORTS))
+    if export_format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+    collection_name, date_field, columns = EXPORTS[kind]
+    if date_field == "booked_at":
+        date_filter = day_string_range_filter(date_from, date_to)
+    else:
+        date_filter = date_range_filter(date_from, date_to)
+    query = {date_field: date_filter} if date_filter else {}
+    projection = {column: 1 for column in columns}
+    # Walk the server-side cursor in _id order so memory stays flat
+    cursor = TenantCollection(collection_name).find(query, projection).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+    rows = export_csv_rows(cursor, columns) if export_format == "csv" else export_ndjson_rows(cursor, columns)
+    if gzip:
+        rows = gzip_stream(rows)
+    filename = f"{kind}.{export_format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if export_format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get("/api/admin/search")
+async def search_records(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str = Query("all", alias="type"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_LIMIT),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    current_user: dict = Depends(get_current_user),
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can search")
+    if kind != "all" and kind not in SEARCH_FIELDS:
+        raise HTTPException(status_code=400, detail="Type must be all, complaints or visitors")
+    kinds = list(SEARCH_FIELDS) if kind == "all" else [kind]
+    query = {}
+    if status_filter:
+        query["status"] = status_filter
+    created_at = date_range_filter(date_from, date_to)
+    if created_at:
+        query["created_at"] = created_at
+    # Each collection returns its best offset + limit + 1 hits; merge them by score
+    fetch = offset + limit + 1
+    results = await asyncio.gather(*(search_backend.search(k, q, dict(query), fetch) for k in kinds))
+    hits = [{**doc, "type": k} for k, docs in zip(kinds, results) for doc in docs]
+    hits.sort(key=lambda hit: hit["score"], reverse=True)
+    page = hits[offset:offset + limit]
+    return BSONResponse({
+        "items": page,
+        "next_offset": offset + limit if len(hits) > offset + limit else None,
+    })
+
+@app.get("/api/admin/cache-stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view cache stats")
+    return {"user_cache": user_cache.stats()}
 
 # Complaints
 @app.post("/api/complaints")
@@ -185,51 +1839,76 @@ async def create_complaint(
         "status": "pending",
         "created_at": datetime.utcnow(),
     }
-    result = complaints_collection.insert_one(complaint_data)
+    result = await complaints_collection.insert_one(complaint_data)
+    invalidate_stats_cache()
+    search_backend.index("complaints", complaint_data)
     return {"complaint_id": str(result.inserted_id)}
 
-@app.get("/api/complaints")
+@app.get("/api/complaints", response_model=List[ComplaintOut])
 async def get_complaints(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "resident":
         raise HTTPException(status_code=403, detail="Only residents can view their complaints")
-    complaints = list(complaints_collection.find({"resident_id": str(current_user["_id"])}))
-    for complaint in complaints:
-        complaint["_id"] = str(complaint["_id"])
-    return complaints
+    complaints = await complaints_collection.find(
+        {"resident_id": str(current_user["_id"])}, COMPLAINT_LIST_PROJECTION
+    ).to_list(None)
+    return BSONResponse(complaints)
 
-@app.get("/api/admin/complaints")
-async def get_all_complaints(current_user: dict = Depends(get_current_user)):
+@app.get("/api/admin/complaints", response_model=ComplaintPage)
+async def get_all_complaints(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view all complaints")
-    complaints = list(complaints_collection.find())
-    for complaint in complaints:
-        complaint["_id"] = str(complaint["_id"])
-        complaint["resident_id"] = str(complaint["resident_id"])
-    return complaints
+    query = {}
+    if status_filter:
+        query["status"] = status_filter
+    created_at = date_range_filter(date_from, date_to)
+    if created_at:
+        query["created_at"] = created_at
+    return await paginate(complaints_collection, query, limit, after, COMPLAINT_LIST_PROJECTION)
 
 @app.post("/api/admin/complaints/{complaint_id}/resolve")
 async def resolve_complaint(complaint_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can resolve complaints")
-    try:
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid complaint ID")
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    complaints_collection.update_one(
-        {"_id": ObjectId(complaint_id)},
-        {"$set": {"status": "resolved", "resolved_at": datetime.utcnow()}}
+    complaint = await mutate_one(
+        complaints_collection, complaint_id, "Complaint",
+        update={"$set": {"status": "resolved", "resolved_at": datetime.utcnow()}},
+        conditions={"status": {"$ne": "resolved"}},
     )
+    invalidate_stats_cache()
+    search_backend.index("complaints", complaint)
     return {"message": "Complaint resolved"}
 
 # Facilities
-@app.get("/api/facilities")
-async def get_facilities():
-    facilities = list(facilities_collection.find())
-    for facility in facilities:
-        facility["_id"] = str(facility["_id"])
-    return facilities
+@app.get("/api/facilities", response_model=List[FacilityOut])
+async def get_facilities(request: Request, society_id: str = Depends(get_request_society)):
+    cache = facilities_cache_entry(society_id)
+    version = await facilities_catalog_version(cache)
+    etag = facilities_etag(society_id, version)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={FACILITIES_MAX_AGE_SECONDS}, must-revalidate",
+        "Vary": REQUEST_SOCIETY_VARY,
+    }
+    # A matching version needs no facilities read at all
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    body = cache["body"]
+    if body is None:
+        # Read after the version, so the body is at least as new as the tag it is served under
+        facilities = await facilities_collection.find({}, FACILITY_PROJECTION).to_list(None)
+        body = dumps_bson(facilities)
+        # Skip caching if a facility changed while we were reading
+        if version == cache["version"]:
+            cache["body"] = body
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/api/admin/facilities")
 async def add_facility(
@@ -242,7 +1921,8 @@ async def add_facility(
         "name": facility.name,
         "available_slots": facility.available_slots,
     }
-    result = facilities_collection.insert_one(facility_data)
+    result = await facilities_collection.insert_one(facility_data)
+    await invalidate_facilities_cache()
     return {"facility_id": str(result.inserted_id)}
 
 @app.put("/api/admin/facilities/{facility_id}")
@@ -253,39 +1933,20 @@ async def update_facility(
 ):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can update facilities")
-    
-    # Validate facility_id format
-    if not re.match(r"^[0-9a-fA-F]{24}$", facility_id):
-        raise HTTPException(status_code=400, detail="Facility ID must be a 24-character hexadecimal string")
-    
-    try:
-        existing_facility = facilities_collection.find_one({"_id": ObjectId(facility_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid facility ID format")
-    if not existing_facility:
-        raise HTTPException(status_code=404, detail="Facility not found")
-    facilities_collection.update_one(
-        {"_id": ObjectId(facility_id)},
-        {"$set": {"name": facility.name, "available_slots": facility.available_slots}}
+    await mutate_one(
+        facilities_collection, facility_id, "Facility",
+        update={"$set": {"name": facility.name, "available_slots": facility.available_slots}},
+        projection={"_id": 1},
     )
+    await invalidate_facilities_cache()
     return {"message": "Facility updated"}
 
 @app.delete("/api/admin/facilities/{facility_id}")
 async def delete_facility(facility_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can delete facilities")
-    
-    # Validate facility_id format
-    if not re.match(r"^[0-9a-fA-F]{24}$", facility_id):
-        raise HTTPException(status_code=400, detail="Facility ID must be a 24-character hexadecimal string")
-    
-    try:
-        facility = facilities_collection.find_one({"_id": ObjectId(facility_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid facility ID format")
-    if not facility:
-        raise HTTPException(status_code=404, detail="Facility not found")
-    facilities_collection.delete_one({"_id": ObjectId(facility_id)})
+    await mutate_one(facilities_collection, facility_id, "Facility", projection={"_id": 1})
+    await invalidate_facilities_cache()
     return {"message": "Facility deleted"}
 
 # Bookings
@@ -298,96 +1959,159 @@ async def create_booking(
         raise HTTPException(status_code=403, detail="Only residents can create bookings")
     
     # Validate facility_id format
-    if not re.match(r"^[0-9a-fA-F]{24}$", booking.facility_id):
+    if not OBJECT_ID_RE.match(booking.facility_id):
         raise HTTPException(status_code=400, detail="Facility ID must be a 24-character hexadecimal string")
     
+    today = datetime.utcnow().date()
+    booking_date = booking.booking_date or today
+    if booking_date < today:
+        raise HTTPException(status_code=400, detail="Cannot book a slot in the past")
+    
     try:
-        facility = facilities_collection.find_one({"_id": ObjectId(booking.facility_id)})
+        facility = await facilities_collection.find_one(
+            {"_id": ObjectId(booking.facility_id)}, {"name": 1, "available_slots": 1}
+        )
     except:
         raise HTTPException(status_code=400, detail="Invalid facility ID format")
     if not facility:
         raise HTTPException(status_code=404, detail="Facility not found")
+    # available_slots is the daily template; per-day claims live in bookings
     if booking.slot not in facility["available_slots"]:
         raise HTTPException(status_code=400, detail="Slot not available")
     booking_data = {
         "facility_id": booking.facility_id,
         "facility_name": facility["name"],
         "slot": booking.slot,
+        "booking_date": booking_date.isoformat(),
         "resident_id": str(current_user["_id"]),
-        "booked_at": datetime.utcnow().isoformat().split("T")[0],
+        "booked_at": today.isoformat(),
     }
-    result = bookings_collection.insert_one(booking_data)
-    facilities_collection.update_one(
-        {"_id": ObjectId(booking.facility_id)},
-        {"$pull": {"available_slots": booking.slot}}
-    )
+    # The unique (facility_id, booking_date, slot) index makes the insert the claim
+    try:
+        result = await bookings_collection.insert_one(booking_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Slot already booked for this date")
+    invalidate_stats_cache()
     return {"booking_id": str(result.inserted_id)}
 
-@app.get("/api/bookings")
+@app.get("/api/facilities/{facility_id}/availability")
+async def get_facility_availability(
+    facility_id: str,
+    response: Response,
+    booking_date: Optional[date] = None,
+    society_id: str = Depends(get_request_society),
+):
+    response.headers["Vary"] = REQUEST_SOCIETY_VARY
+    if not OBJECT_ID_RE.match(facility_id):
+        raise HTTPException(status_code=400, detail="Facility ID must be a 24-character hexadecimal string")
+    facility = await facilities_collection.find_one({"_id": ObjectId(facility_id)}, {"available_slots": 1})
+    if not facility:
+        raise HTTPException(status_code=404, detail="Facility not found")
+    booking_date = booking_date or datetime.utcnow().date()
+    booked = await bookings_collection.find(
+        {"facility_id": facility_id, "booking_date": booking_date.isoformat()}, {"slot": 1, "_id": 0}
+    ).to_list(None)
+    booked_slots = {b["slot"] for b in booked}
+    return {
+        "facility_id": facility_id,
+        "booking_date": booking_date.isoformat(),
+        "available_slots": [slot for slot in facility["available_slots"] if slot not in booked_slots],
+        "booked_slots": sorted(booked_slots),
+    }
+
+@app.get("/api/bookings", response_model=List[BookingOut])
 async def get_bookings(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "resident":
         raise HTTPException(status_code=403, detail="Only residents can view their bookings")
-    bookings = list(bookings_collection.find({"resident_id": str(current_user["_id"])}))
-    for booking in bookings:
-        booking["_id"] = str(booking["_id"])
-    return bookings
+    bookings = await bookings_collection.find(
+        {"resident_id": str(current_user["_id"])}, BOOKING_LIST_PROJECTION
+    ).to_list(None)
+    return BSONResponse(bookings)
 
-@app.get("/api/admin/bookings")
-async def get_all_bookings(current_user: dict = Depends(get_current_user)):
+@app.get("/api/admin/bookings", response_model=BookingPage)
+async def get_all_bookings(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view all bookings")
-    bookings = list(bookings_collection.find())
-    for booking in bookings:
-        booking["_id"] = str(booking["_id"])
-        booking["resident_id"] = str(booking["resident_id"])
-    return bookings
+    query = {}
+    booked_at = day_string_range_filter(date_from, date_to)
+    if booked_at:
+        query["booked_at"] = booked_at
+    return await paginate(bookings_collection, query, limit, after, BOOKING_LIST_PROJECTION)
 
 @app.delete("/api/admin/bookings/{booking_id}")
 async def cancel_booking(booking_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can cancel bookings")
-    
-    # Validate booking_id format
-    if not re.match(r"^[0-9a-fA-F]{24}$", booking_id):
-        raise HTTPException(status_code=400, detail="Booking ID must be a 24-character hexadecimal string")
-    
-    try:
-        booking = bookings_collection.find_one({"_id": ObjectId(booking_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid booking ID format")
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    # Validate facility_id in the booking
-    if not isinstance(booking.get("facility_id"), str) or not re.match(r"^[0-9a-fA-F]{24}$", booking["facility_id"]):
-        raise HTTPException(status_code=400, detail="Invalid facility ID in booking: must be a 24-character hexadecimal string")
-    
-    try:
-        facility = facilities_collection.find_one({"_id": ObjectId(booking["facility_id"])})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid facility ID format in booking")
-    if not facility:
-        raise HTTPException(status_code=404, detail="Facility not found")
-    
-    facilities_collection.update_one(
-        {"_id": ObjectId(booking["facility_id"])},
-        {"$push": {"available_slots": booking["slot"]}}
-    )
-    bookings_collection.delete_one({"_id": ObjectId(booking_id)})
+    # Deleting the booking releases its date-scoped slot claim in one operation
+    booking = await mutate_one(bookings_collection, booking_id, "Booking")
+    invalidate_stats_cache()
+
+    # Legacy bookings pulled the slot from the facility template, so restore it
+    if "booking_date" not in booking and isinstance(booking.get("facility_id"), str) and OBJECT_ID_RE.match(booking["facility_id"]):
+        await facilities_collection.update_one(
+            {"_id": ObjectId(booking["facility_id"])},
+            {"$addToSet": {"available_slots": booking["slot"]}}
+        )
+        await invalidate_facilities_cache()
     return JSONResponse(
         content={"message": "Booking canceled"},
         headers={"Access-Control-Allow-Origin": "http://localhost:5173"}
     )
 
 # Visitors
-@app.get("/api/visitors/pending")
+@app.get("/api/visitors/pending", response_model=List[VisitorOut])
 async def get_pending_visitors(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "resident":
         raise HTTPException(status_code=403, detail="Only residents can view pending visitors")
-    visitors = list(visitors_collection.find({"status": "pending"}))
-    for visitor in visitors:
-        visitor["_id"] = str(visitor["_id"])
-    return visitors
+    # Served by the (resident_id, status, created_at) index
+    visitors = await visitors_collection.find(
+        {"resident_id": str(current_user["_id"]), "status": "pending"}, VISITOR_LIST_PROJECTION
+    ).sort("created_at", -1).to_list(MAX_PAGE_LIMIT)
+    return BSONResponse(visitors)
+
+@app.post("/api/visitors/events/ticket")
+async def create_visitor_events_ticket(current_user: dict = Depends(get_current_user)):
+    # EventSource cannot send headers, so the stream is opened with a short-lived ticket in the
+    # query string; it ends up in access logs, which is why it is not the bearer token itself
+    ticket = create_access_token(
+        {"sub": str(current_user["_id"]), "role": current_user["role"],
+         "society": current_society_id(), "purpose": VISITOR_EVENT_TICKET_PURPOSE},
+        expires=timedelta(seconds=VISITOR_EVENT_TICKET_SECONDS),
+    )
+    return {"ticket": ticket, "expires_in": VISITOR_EVENT_TICKET_SECONDS}
+
+@app.get("/api/visitors/events")
+async def stream_visitor_events(request: Request, ticket: str):
+    # The ticket only gates opening the stream; an open stream outlives its expiry
+    current_user = await authenticate(ticket, purpose=VISITOR_EVENT_TICKET_PURPOSE)
+    subscription = visitor_events.subscribe(current_user)
+
+    async def event_stream():
+        try:
+            yield b"retry: 3000\n\n"
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), VISITOR_EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"data: " + dumps_bson(event) + b"\n\n"
+        finally:
+            visitor_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/api/visitors/{visitor_id}/{decision}")
 async def handle_visitor(
@@ -399,26 +2123,35 @@ async def handle_visitor(
         raise HTTPException(status_code=403, detail="Only residents can handle visitors")
     if decision not in ["approve", "deny"]:
         raise HTTPException(status_code=400, detail="Invalid decision")
-    try:
-        visitor = visitors_collection.find_one({"_id": ObjectId(visitor_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid visitor ID")
-    if not visitor:
-        raise HTTPException(status_code=404, detail="Visitor not found")
-    visitors_collection.update_one(
-        {"_id": ObjectId(visitor_id)},
-        {"$set": {"status": decision, "handled_at": datetime.utcnow()}}
+    visitor = await mutate_one(
+        visitors_collection, visitor_id, "Visitor",
+        update={"$set": {"status": decision, "handled_at": datetime.utcnow()}},
+        scope={"resident_id": str(current_user["_id"])},
+        conditions={"status": "pending"},
     )
+    invalidate_stats_cache()
+    search_backend.index("visitors", visitor)
+    await visitor_events.publish(VISITOR_EVENT_TYPES[decision], visitor)
     return {"message": f"Visitor {decision}ed"}
 
-@app.get("/api/admin/visitors")
-async def get_all_visitors(current_user: dict = Depends(get_current_user)):
+@app.get("/api/admin/visitors", response_model=VisitorPage)
+async def get_all_visitors(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view all visitors")
-    visitors = list(visitors_collection.find())
-    for visitor in visitors:
-        visitor["_id"] = str(visitor["_id"])
-    return visitors
+    query = {}
+    if status_filter:
+        query["status"] = status_filter
+    created_at = date_range_filter(date_from, date_to)
+    if created_at:
+        query["created_at"] = created_at
+    return await paginate(visitors_collection, query, limit, after, VISITOR_LIST_PROJECTION)
 
 @app.post("/api/admin/visitors/{visitor_id}/{decision}")
 async def admin_handle_visitor(
@@ -430,27 +2163,35 @@ async def admin_handle_visitor(
         raise HTTPException(status_code=403, detail="Only admins can handle visitors")
     if decision not in ["approve", "deny"]:
         raise HTTPException(status_code=400, detail="Invalid decision")
-    try:
-        visitor = visitors_collection.find_one({"_id": ObjectId(visitor_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid visitor ID")
-    if not visitor:
-        raise HTTPException(status_code=404, detail="Visitor not found")
-    visitors_collection.update_one(
-        {"_id": ObjectId(visitor_id)},
-        {"$set": {"status": decision, "handled_at": datetime.utcnow()}}
+    visitor = await mutate_one(
+        visitors_collection, visitor_id, "Visitor",
+        update={"$set": {"status": decision, "handled_at": datetime.utcnow()}},
+        conditions={"status": "pending"},
     )
+    invalidate_stats_cache()
+    search_backend.index("visitors", visitor)
+    await visitor_events.publish(VISITOR_EVENT_TYPES[decision], visitor)
     return {"message": f"Visitor {decision}ed by admin"}
 
 # Security Endpoints
-@app.get("/api/security/visitors")
-async def get_all_visitors_for_security(current_user: dict = Depends(get_current_user)):
+@app.get("/api/security/visitors", response_model=VisitorPage)
+async def get_all_visitors_for_security(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+):
     if current_user["role"] != "security":
         raise HTTPException(status_code=403, detail="Only security personnel can view visitors")
-    visitors = list(visitors_collection.find())
-    for visitor in visitors:
-        visitor["_id"] = str(visitor["_id"])
-    return visitors
+    query = {}
+    if status_filter:
+        query["status"] = status_filter
+    created_at = date_range_filter(date_from, date_to)
+    if created_at:
+        query["created_at"] = created_at
+    return await paginate(visitors_collection, query, limit, after, VISITOR_LIST_PROJECTION)
 
 @app.post("/api/security/visitors")
 async def add_visitor(
@@ -459,13 +2200,30 @@ async def add_visitor(
 ):
     if current_user["role"] != "security":
         raise HTTPException(status_code=403, detail="Only security personnel can add visitors")
+    if visitor.resident_id:
+        if not OBJECT_ID_RE.match(visitor.resident_id):
+            raise HTTPException(status_code=400, detail="Resident ID must be a 24-character hexadecimal string")
+        resident = await users_collection.find_one(
+            {"_id": ObjectId(visitor.resident_id), "role": "resident"}, {"address": 1}
+        )
+    elif visitor.flat:
+        resident = await users_collection.find_one({"address": visitor.flat, "role": "resident"}, {"address": 1})
+    else:
+        raise HTTPException(status_code=400, detail="Either resident_id or flat is required")
+    if not resident:
+        raise HTTPException(status_code=404, detail="Resident not found")
     visitor_data = {
         "name": visitor.name,
         "purpose": visitor.purpose,
+        "resident_id": str(resident["_id"]),
+        "flat": resident.get("address"),
         "status": "pending",
         "created_at": datetime.utcnow(),
     }
-    result = visitors_collection.insert_one(visitor_data)
+    result = await visitors_collection.insert_one(visitor_data)
+    invalidate_stats_cache()
+    search_backend.index("visitors", visitor_data)
+    await visitor_events.publish("visitor.created", visitor_data)
     return {"visitor_id": str(result.inserted_id)}
 
 @app.post("/api/security/visitors/{visitor_id}/update-status")
@@ -476,16 +2234,14 @@ async def update_visitor_status(
 ):
     if current_user["role"] != "security":
         raise HTTPException(status_code=403, detail="Only security personnel can update visitor status")
-    if status not in ["entered", "exited"]:
+    if status not in VISITOR_STATUS_TRANSITIONS:
         raise HTTPException(status_code=400, detail="Invalid status")
-    try:
-        visitor = visitors_collection.find_one({"_id": ObjectId(visitor_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid visitor ID")
-    if not visitor:
-        raise HTTPException(status_code=404, detail="Visitor not found")
-    visitors_collection.update_one(
-        {"_id": ObjectId(visitor_id)},
-        {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+    visitor = await mutate_one(
+        visitors_collection, visitor_id, "Visitor",
+        update={"$set": {"status": status, "updated_at": datetime.utcnow()}},
+        conditions={"status": VISITOR_STATUS_TRANSITIONS[status]},
     )
-    return {"message": f"Visitor status updated to {status}"}
\ No newline at end of file
+    invalidate_stats_cache()
+    search_backend.index("visitors", visitor)
+    await visitor_events.publish(VISITOR_EVENT_TYPES[status], visitor)
+    return {"message": f"Visitor status updated to {status}"}
@@ -0,0 +1,54 @@
+# migrate_tenancy.py
+# Moves a single-society database onto the multi-society schema: stamps every document with a
+# society_id and drops the indexes that were not prefixed by it (the app builds the new ones).
+# Run once, before deploying the tenancy release: python migrate_tenancy.py [--society ID] [--dry-run]
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+import os
+import sys
+
+load_dotenv()
+
+COLLECTIONS = ["users", "complaints", "bookings", "facilities", "visitors", "visitors_archive", "bookings_archive"]
+# Superseded by society-prefixed equivalents; the text indexes must go because a
+# collection can only have one, and a global unique email would block shared emails
+LEGACY_INDEXES = {
+    "users": ["address_1_role_1", "email_1"],
+    "complaints": ["status_1__id_-1", "created_at_-1", "resident_id_1", "complaints_text"],
+    "bookings": ["booked_at_-1", "resident_id_1", "facility_id_1_booking_date_1_slot_1"],
+    "visitors": ["status_1__id_-1", "resident_id_1_status_1_created_at_-1", "created_at_-1", "visitors_text"],
+    "visitors_archive": ["created_at_-1"],
+    "bookings_archive": ["booked_at_-1"],
+}
+
+def main(society_id, dry_run=False):
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    db = client[os.getenv("MONGO_DB_NAME", "esocietydb")]
+
+    for name in COLLECTIONS:
+        query = {"society_id": {"$exists": False}}
+        if dry_run:
+            print(f"{name}: {db[name].count_documents(query)} documents to stamp (dry run)")
+        else:
+            result = db[name].update_many(query, {"$set": {"society_id": society_id}})
+            print(f"{name}: stamped {result.modified_count} documents with society {society_id}")
+
+    for name, indexes in LEGACY_INDEXES.items():
+        existing = db[name].index_information()
+        for index in indexes:
+            if index not in existing:
+                continue
+            if dry_run:
+                print(f"{name}: would drop index {index} (dry run)")
+                continue
+            try:
+                db[name].drop_index(index)
+                print(f"{name}: dropped index {index}")
+            except OperationFailure as e:
+                print(f"{name}: could not drop index {index}: {e}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    society = args[args.index("--society") + 1] if "--society" in args else os.getenv("DEFAULT_SOCIETY_ID", "default")
+    main(society, dry_run="--dry-run" in args)
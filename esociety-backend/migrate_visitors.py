@@ -0,0 +1,27 @@
+# migrate_visitors.py
+# Marks visitors created before visitors were tied to a resident as unattributed.
+# The old add_visitor stored neither a resident nor a flat, so there is nothing to link a
+# legacy visitor by: they get explicit nulls, which only admins can see, instead of being
+# matched to a guessed host. Indexes are built by the app on startup (ensure_indexes).
+# Run once: python migrate_visitors.py [--dry-run]
+from pymongo import MongoClient
+from dotenv import load_dotenv
+import os
+import sys
+
+load_dotenv()
+
+def main(dry_run=False):
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    db = client[os.getenv("MONGO_DB_NAME", "esocietydb")]
+    visitors = db["visitors"]
+
+    query = {"resident_id": {"$exists": False}}
+    if dry_run:
+        print(f"{visitors.count_documents(query)} legacy visitors would be marked unattributed (dry run)")
+        return
+    result = visitors.update_many(query, {"$set": {"resident_id": None, "flat": None}})
+    print(f"Marked {result.modified_count} legacy visitors unattributed; they cannot be linked to a resident")
+
+if __name__ == "__main__":
+    main(dry_run="--dry-run" in sys.argv)
@@ -0,0 +1,193 @@
+# conftest.py
+# Runs the app in-process against mongomock. mongomock is synchronous, so a thin adapter
+# gives it the async PyMongo surface main.py uses, and reports every call to the app's own
+# CommandMetricsListener so per-request command counts behave as they do against mongod.
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# The app reads its settings at import time
+os.environ.update({
+    "MONGO_DB_NAME": "esociety_test",
+    "TENANT_DATABASES": "",
+    "SEARCH_BACKEND": "memory",
+    "VISITOR_EVENT_BROKER": "local",
+    "SCHEDULER_ENABLED": "false",
+    "LOG_SAMPLE_RATE": "0",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import mongomock
+import pytest
+
+import main
+
+PASSWORD = "password123"
+PASSWORD_HASH = main.get_password_hash(PASSWORD)  # bcrypt is slow; hash once per session
+command_listener = main.CommandMetricsListener()
+
+def record_command(name: str):
+    command_listener.succeeded(SimpleNamespace(command_name=name, duration_micros=0))
+
+class MockCursor:
+    def __init__(self, collection, args, kwargs):
+        self._collection, self._args, self._kwargs = collection, args, kwargs
+        self._sort, self._limit = None, 0
+
+    def sort(self, key, direction=None):
+        self._sort = key if direction is None else [(key, direction)]
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    def _fetch(self):
+        record_command("find")
+        cursor = self._collection.find(*self._args, **self._kwargs)
+        if self._sort:
+            cursor = cursor.sort(self._sort)
+        if self._limit:
+            cursor = cursor.limit(self._limit)
+        return cursor
+
+    async def to_list(self, length=None):
+        docs = list(self._fetch())
+        return docs if length is None else docs[:length]
+
+    async def __aiter__(self):
+        for doc in self._fetch():
+            yield doc
+
+    async def close(self):
+        pass
+
+class MockCollection:
+    COMMANDS = {
+        "find_one": "find", "insert_one": "insert", "insert_many": "insert", "update_one": "update",
+        "update_many": "update", "find_one_and_update": "findAndModify", "find_one_and_delete": "findAndModify",
+        "delete_one": "delete", "delete_many": "delete", "create_index": "createIndexes",
+        "count_documents": "aggregate", "index_information": "listIndexes",
+    }
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def find(self, *args, **kwargs):
+        kwargs.pop("cursor_type", None)
+        return MockCursor(self._collection, args, kwargs)
+
+    async def aggregate(self, pipeline, **kwargs):
+        record_command("aggregate")
+        docs = list(self._collection.aggregate(pipeline))
+
+        class Results:
+            async def __aiter__(self):
+                for doc in docs:
+                    yield doc
+
+            async def to_list(self, length=None):
+                return docs
+
+        return Results()
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+        command = self.COMMANDS[name]
+
+        async def call(*args, **kwargs):
+            record_command(command)
+            return method(*args, **kwargs)
+
+        return call
+
+class MockDatabase:
+    def __init__(self, database):
+        self._database = database
+        self.name = database.name
+
+    def __getitem__(self, name: str) -> MockCollection:
+        return MockCollection(self._database[name])
+
+    async def command(self, *args, **kwargs):
+        return {"ok": 1}
+
+    async def create_collection(self, name: str, **kwargs):
+        self._database.create_collection(name)
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="also run tests marked slow")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long-running; skipped unless --run-slow is given")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def db():
+    """A fresh, indexed database wired into the app; returns the synchronous mongomock handle."""
+    database = mongomock.MongoClient()[main.MONGO_DB_NAME]
+    main.db = MockDatabase(database)
+    main.tenant_router = main.TenantRouter("")
+    main.search_backend = main.InMemorySearchBackend()
+    main.stats_cache.clear()
+    main.facilities_cache.clear()
+    main.login_rate_limiter = main.RateLimiter(main.LOGIN_RATE_LIMIT_ATTEMPTS, main.LOGIN_RATE_LIMIT_WINDOW_SECONDS)
+    main.ip_login_rate_limiter = main.RateLimiter(main.LOGIN_RATE_LIMIT_IP_ATTEMPTS, main.LOGIN_RATE_LIMIT_WINDOW_SECONDS)
+    asyncio.run(main.ensure_indexes(main.db))
+    return database
+
+@pytest.fixture
+def users(db):
+    """One user per role in the default society, keyed by role."""
+    created = {}
+    for role in ("admin", "resident", "security"):
+        user = {
+            "email": f"{role}@example.com",
+            "hashed_password": PASSWORD_HASH,
+            "role": role,
+            "name": role.title(),
+            "phone": "9000000000",
+            "address": "A-101" if role == "resident" else "Office",
+            "society_id": main.DEFAULT_SOCIETY_ID,
+        }
+        db["users"].insert_one(user)
+        created[role] = user
+    return created
+
+@pytest.fixture
+def headers(users):
+    """Bearer headers per role."""
+    return {
+        role: {"Authorization": "Bearer " + main.create_access_token(
+            {"sub": str(user["_id"]), "role": role, "society": user["society_id"]}
+        )}
+        for role, user in users.items()
+    }
+
+@pytest.fixture
+async def client(db):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+
+def route_commands(route: str) -> int:
+    """Mongo commands recorded so far for a route template, as reported by /metrics."""
+    series = main.http_request_db_commands.values.get((route,))
+    return int(series[-2]) if series else 0
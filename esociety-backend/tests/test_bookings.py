@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+import main
+
+pytestmark = pytest.mark.anyio
+
+CONTENDERS = 50
+
+async def test_concurrent_bookings_for_one_slot_claim_it_once(client, db, headers):
+    facility_id = str(db["facilities"].insert_one({
+        "name": "Tennis Court",
+        "available_slots": ["07:00-08:00"],
+        "society_id": main.DEFAULT_SOCIETY_ID,
+    }).inserted_id)
+    booking = {"facility_id": facility_id, "slot": "07:00-08:00"}
+
+    responses = await asyncio.gather(*(
+        client.post("/api/bookings", json=booking, headers=headers["resident"]) for _ in range(CONTENDERS)
+    ))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200] + [409] * (CONTENDERS - 1)
+    assert db["bookings"].count_documents({"facility_id": facility_id}) == 1
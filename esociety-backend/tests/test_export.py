@@ -0,0 +1,78 @@
+# Exports must stream: peak memory stays flat however many documents the cursor yields.
+# mongomock materializes whole result sets, so the cursor here generates documents lazily.
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+import main
+
+pytestmark = pytest.mark.anyio
+
+MEMORY_CEILING_BYTES = 2 * 1024 * 1024  # Streaming peaks under 1 MB; the bodies are 5-11 MB
+
+class SyntheticCursor:
+    def __init__(self, count: int):
+        self.count = count
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    async def __aiter__(self):
+        started = datetime(2026, 1, 1)
+        for i in range(self.count):
+            yield {
+                "_id": ObjectId(), "name": f"Visitor {i}", "purpose": "Delivery", "flat": f"T{i % 20}-{i // 20}",
+                "resident_id": "0" * 24, "status": "exited", "created_at": started + timedelta(seconds=i),
+            }
+
+class SyntheticDatabase:
+    def __init__(self, count: int):
+        self.count = count
+
+    def __getitem__(self, name: str):
+        return self
+
+    def find(self, *args, **kwargs):
+        return SyntheticCursor(self.count)
+
+async def export_peak_memory(monkeypatch, users, count: int, export_format: str, gzip: bool):
+    """Streams an export of count visitors; returns (rows, bytes, peak traced bytes)."""
+    monkeypatch.setattr(main, "db", SyntheticDatabase(count))
+    main.current_society.set(main.DEFAULT_SOCIETY_ID)
+    response = await main.export_history(
+        "visitors", export_format=export_format, date_from=None, date_to=None, gzip=gzip, current_user=users["admin"]
+    )
+    # Drive the body iterator directly: an HTTP test client would buffer the whole body
+    lines = size = 0
+    tracemalloc.start()
+    try:
+        async for chunk in response.body_iterator:
+            size += len(chunk)
+            if not gzip:
+                lines += chunk.count(b"\n")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return lines, size, peak
+
+@pytest.mark.parametrize("export_format,gzip", [("csv", False), ("ndjson", False), ("csv", True)])
+async def test_export_streams_in_bounded_memory(monkeypatch, users, export_format, gzip):
+    count = 50_000
+    lines, size, peak = await export_peak_memory(monkeypatch, users, count, export_format, gzip)
+    if not gzip:
+        assert lines == count + (export_format == "csv")  # CSV adds a header row
+        assert size > MEMORY_CEILING_BYTES  # Buffering the body would break the ceiling
+    assert peak < MEMORY_CEILING_BYTES, f"peak {peak} bytes while streaming {size} bytes"
+
+@pytest.mark.slow
+async def test_export_of_a_million_documents_streams_in_bounded_memory(monkeypatch, users):
+    count = 1_000_000
+    lines, size, peak = await export_peak_memory(monkeypatch, users, count, "csv", False)
+    assert lines == count + 1
+    assert size > MEMORY_CEILING_BYTES * 4  # The body itself could never fit under the ceiling
+    assert peak < MEMORY_CEILING_BYTES, f"peak {peak} bytes while streaming {size} bytes"
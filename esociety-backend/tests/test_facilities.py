@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+
+pytestmark = pytest.mark.anyio
+
+async def test_facility_writes_change_the_etag(client, headers):
+    first = await client.get("/api/facilities")
+    etag = first.headers["etag"]
+    assert (await client.get("/api/facilities", headers={"If-None-Match": etag})).status_code == 304
+
+    response = await client.post(
+        "/api/admin/facilities", json={"name": "Gym", "available_slots": ["06:00-07:00"]}, headers=headers["admin"]
+    )
+    assert response.status_code == 200
+    second = await client.get("/api/facilities", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+    assert [facility["name"] for facility in second.json()] == ["Gym"]
+
+async def test_other_workers_writes_are_seen_after_the_version_check(client, db, monkeypatch):
+    etag = (await client.get("/api/facilities")).headers["etag"]
+    # Another worker adds a facility: only the shared version document tells this one
+    db["facilities"].insert_one({"name": "Pool", "available_slots": [], "society_id": main.DEFAULT_SOCIETY_ID})
+    db["catalog_versions"].update_one(
+        {"society_id": main.DEFAULT_SOCIETY_ID}, {"$inc": {"facilities": 1}}, upsert=True
+    )
+    # Within the check interval the cached catalog is still served
+    assert (await client.get("/api/facilities", headers={"If-None-Match": etag})).status_code == 304
+
+    monkeypatch.setattr(main, "FACILITIES_VERSION_CHECK_SECONDS", 0)
+    response = await client.get("/api/facilities", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [facility["name"] for facility in response.json()] == ["Pool"]
+
+async def test_archiving_a_legacy_booking_returns_its_slot(db):
+    facility_id = db["facilities"].insert_one({
+        "name": "Tennis Court", "available_slots": ["08:00-09:00"], "society_id": main.DEFAULT_SOCIETY_ID,
+    }).inserted_id
+    # Booked before bookings had a date: the slot was pulled from the template
+    db["bookings"].insert_one({
+        "facility_id": str(facility_id), "facility_name": "Tennis Court", "slot": "07:00-08:00",
+        "resident_id": "a" * 24, "booked_at": (datetime.utcnow() - timedelta(days=400)).date().isoformat(),
+        "society_id": main.DEFAULT_SOCIETY_ID,
+    })
+
+    result = await main.archive_old_bookings()
+
+    assert result == {"archived": 1, "restored_slots": 1}
+    assert sorted(db["facilities"].find_one({"_id": facility_id})["available_slots"]) == ["07:00-08:00", "08:00-09:00"]
+    assert db["catalog_versions"].find_one({"society_id": main.DEFAULT_SOCIETY_ID})["facilities"] == 1
+    assert db["bookings"].count_documents({}) == 0
+
+async def test_facility_responses_vary_by_society(client, db):
+    facility_id = db["facilities"].insert_one({
+        "name": "Gym", "available_slots": ["06:00-07:00"], "society_id": main.DEFAULT_SOCIETY_ID,
+    }).inserted_id
+    catalog = await client.get("/api/facilities")
+    availability = await client.get(f"/api/facilities/{facility_id}/availability")
+    revalidated = await client.get("/api/facilities", headers={"If-None-Match": catalog.headers["etag"]})
+
+    for response in (catalog, availability, revalidated):
+        # CORSMiddleware may append Origin
+        assert response.headers["vary"].startswith(main.REQUEST_SOCIETY_VARY)
+    assert catalog.headers["cache-control"].startswith("private")
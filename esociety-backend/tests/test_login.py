@@ -0,0 +1,48 @@
+import pytest
+from starlette.requests import Request
+
+import main
+from conftest import PASSWORD
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture(autouse=True)
+def small_limits(db, monkeypatch):
+    # bcrypt makes each login slow, so shrink the budgets rather than burn through the defaults
+    monkeypatch.setattr(main, "login_rate_limiter", main.RateLimiter(3, 60))
+    monkeypatch.setattr(main, "ip_login_rate_limiter", main.RateLimiter(5, 60))
+
+async def login(client, email, password, **kwargs):
+    return await client.post("/login", data={"username": email, "password": password}, **kwargs)
+
+async def test_successful_logins_are_not_rate_limited(client, users):
+    # Twice the per-account and per-address budgets, all from one address
+    for _ in range(10):
+        response = await login(client, "resident@example.com", PASSWORD)
+        assert response.status_code == 200
+
+async def test_failed_logins_lock_the_account(client, users):
+    for _ in range(3):
+        assert (await login(client, "resident@example.com", "wrong-password1")).status_code == 401
+    # Locked even with the right password, until the window passes
+    assert (await login(client, "resident@example.com", PASSWORD)).status_code == 429
+    # Other accounts behind the same address are unaffected until the address budget runs out
+    assert (await login(client, "admin@example.com", PASSWORD)).status_code == 200
+    for _ in range(2):
+        assert (await login(client, "admin@example.com", "wrong-password1")).status_code == 401
+    assert (await login(client, "security@example.com", PASSWORD)).status_code == 429
+
+def make_request(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(main, "TRUSTED_PROXIES", [])
+    assert main.client_ip(make_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+def test_client_ip_reads_through_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(main, "TRUSTED_PROXIES", [main.ipaddress.ip_network("10.0.0.0/8")])
+    # Spoofed left-most entries are skipped: the first untrusted hop from the right wins
+    request = make_request("10.0.0.2", "1.2.3.4, 198.51.100.7, 10.0.0.1")
+    assert main.client_ip(request) == "198.51.100.7"
+    assert main.client_ip(make_request("10.0.0.2")) == "10.0.0.2"
@@ -0,0 +1,42 @@
+# Request metrics must cover the whole response, including bodies streamed after the headers
+from datetime import datetime
+
+import pytest
+
+import main
+from conftest import route_commands
+
+pytestmark = pytest.mark.anyio
+
+EXPORT_ROUTE = "/api/admin/export/{kind}"
+
+async def test_streamed_exports_are_measured_until_the_last_body_chunk(client, db, headers):
+    db["visitors"].insert_one({
+        "name": "Courier", "purpose": "Delivery", "resident_id": None, "status": "exited",
+        "created_at": datetime.utcnow(), "society_id": main.DEFAULT_SOCIETY_ID,
+    })
+    await client.get("/me", headers=headers["admin"])  # Keep the token's user lookup out of the count
+    in_flight_while_streaming = []
+    token = headers["admin"]["Authorization"].encode()
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/admin/export/visitors", "raw_path": b"/api/admin/export/visitors",
+        "query_string": b"", "headers": [(b"authorization", token)], "scheme": "http", "http_version": "1.1",
+        "server": ("test", 80), "client": ("127.0.0.1", 1234), "root_path": "",
+        # 2.4 servers report disconnects through send(), so the response does not poll receive()
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            in_flight_while_streaming.append(main.http_requests_in_flight.values.get((), 0))
+
+    before = route_commands(EXPORT_ROUTE)
+    await main.app(scope, receive, send)
+
+    assert in_flight_while_streaming and min(in_flight_while_streaming) >= 1
+    assert main.http_requests_in_flight.values.get((), 0) == 0
+    # The cursor is only read while the body streams
+    assert route_commands(EXPORT_ROUTE) - before == 1
@@ -0,0 +1,91 @@
+# Single-round-trip mutations: a write that succeeds costs one Mongo command, and only a
+# guarded write that fails pays a second lookup to tell 409 (wrong state) from 404 (missing)
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+import main
+from conftest import route_commands
+
+pytestmark = pytest.mark.anyio
+
+MISSING = str(ObjectId())
+
+@pytest.fixture(autouse=True)
+async def warm_user_cache(client, headers):
+    # Keep the token's user lookup out of the counts
+    for role_headers in headers.values():
+        await client.get("/me", headers=role_headers)
+
+async def call(client, method, route, path, headers, **kwargs):
+    """(status, Mongo commands) for one request, read from the per-route histogram."""
+    before = route_commands(route)
+    response = await client.request(method, path, headers=headers, **kwargs)
+    return response.status_code, route_commands(route) - before
+
+def insert(db, collection, **doc):
+    return str(db[collection].insert_one({**doc, "society_id": main.DEFAULT_SOCIETY_ID}).inserted_id)
+
+def visitor(db, resident_id, status):
+    return insert(db, "visitors", name="Courier", purpose="Delivery", resident_id=resident_id,
+                  flat="A-101", status=status, created_at=datetime.utcnow())
+
+async def test_resolve_complaint(client, db, headers, users):
+    route = "/api/admin/complaints/{complaint_id}/resolve"
+    complaint_id = insert(db, "complaints", title="Leak", description="Tower A", status="pending",
+                          resident_id=str(users["resident"]["_id"]), created_at=datetime.utcnow())
+    path = f"/api/admin/complaints/{complaint_id}/resolve"
+    assert await call(client, "POST", route, path, headers["admin"]) == (200, 1)
+    assert await call(client, "POST", route, path, headers["admin"]) == (409, 2)
+    assert await call(client, "POST", route, f"/api/admin/complaints/{MISSING}/resolve", headers["admin"]) == (404, 2)
+
+async def test_update_and_delete_facility(client, db, headers):
+    facility_id = insert(db, "facilities", name="Gym", available_slots=["06:00-07:00"])
+    body = {"name": "Gym", "available_slots": ["07:00-08:00"]}
+    route = "/api/admin/facilities/{facility_id}"
+    # Success also bumps the catalog version; an unconditional miss is a plain 404 with no lookup
+    assert await call(client, "PUT", route, f"/api/admin/facilities/{facility_id}", headers["admin"], json=body) == (200, 2)
+    assert await call(client, "PUT", route, f"/api/admin/facilities/{MISSING}", headers["admin"], json=body) == (404, 1)
+    assert await call(client, "DELETE", route, f"/api/admin/facilities/{facility_id}", headers["admin"]) == (200, 2)
+    assert await call(client, "DELETE", route, f"/api/admin/facilities/{facility_id}", headers["admin"]) == (404, 1)
+
+async def test_cancel_booking(client, db, headers, users):
+    booking_id = insert(db, "bookings", facility_id=str(ObjectId()), facility_name="Gym", slot="06:00-07:00",
+                        booking_date="2026-01-01", resident_id=str(users["resident"]["_id"]), booked_at="2026-01-01")
+    route = "/api/admin/bookings/{booking_id}"
+    assert await call(client, "DELETE", route, f"/api/admin/bookings/{booking_id}", headers["admin"]) == (200, 1)
+    assert await call(client, "DELETE", route, f"/api/admin/bookings/{booking_id}", headers["admin"]) == (404, 1)
+
+async def test_handle_visitor(client, db, headers, users):
+    route = "/api/visitors/{visitor_id}/{decision}"
+    own = visitor(db, str(users["resident"]["_id"]), "pending")
+    assert await call(client, "POST", route, f"/api/visitors/{own}/approve", headers["resident"]) == (200, 1)
+    assert await call(client, "POST", route, f"/api/visitors/{own}/deny", headers["resident"]) == (409, 2)
+    # Someone else's visitor is outside the resident's scope: 404, never 409
+    other = visitor(db, str(ObjectId()), "pending")
+    assert await call(client, "POST", route, f"/api/visitors/{other}/approve", headers["resident"]) == (404, 2)
+
+async def test_admin_handle_visitor(client, db, headers):
+    route = "/api/admin/visitors/{visitor_id}/{decision}"
+    visitor_id = visitor(db, str(ObjectId()), "pending")
+    assert await call(client, "POST", route, f"/api/admin/visitors/{visitor_id}/deny", headers["admin"]) == (200, 1)
+    assert await call(client, "POST", route, f"/api/admin/visitors/{visitor_id}/approve", headers["admin"]) == (409, 2)
+    assert await call(client, "POST", route, f"/api/admin/visitors/{MISSING}/approve", headers["admin"]) == (404, 2)
+
+async def test_update_visitor_status_transitions(client, db, headers):
+    route = "/api/security/visitors/{visitor_id}/update-status"
+
+    async def move(visitor_id, status):
+        path = f"/api/security/visitors/{visitor_id}/update-status"
+        return await call(client, "POST", route, path, headers["security"], params={"status": status})
+
+    pending = visitor(db, str(ObjectId()), "pending")
+    assert await move(pending, "entered") == (409, 2)
+    approved = visitor(db, str(ObjectId()), "approve")
+    assert await move(approved, "exited") == (409, 2)
+    assert await move(approved, "entered") == (200, 1)
+    assert await move(approved, "entered") == (409, 2)
+    assert await move(approved, "exited") == (200, 1)
+    assert await move(MISSING, "entered") == (404, 2)
+    assert db["visitors"].find_one({"_id": ObjectId(pending)})["status"] == "pending"
@@ -0,0 +1,62 @@
+import typing
+
+import pytest
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+import main
+
+pytestmark = pytest.mark.anyio
+
+def assert_matches(annotation, payload):
+    """Validates payload against a response model, also rejecting fields the model does not declare."""
+    if typing.get_origin(annotation) is list:
+        assert payload, "empty list proves nothing about the shape"
+        for item in payload:
+            assert_matches(typing.get_args(annotation)[0], item)
+        return
+    fields = {field.alias or name: field for name, field in annotation.model_fields.items()}
+    undeclared = set(payload) - set(fields)
+    assert not undeclared, f"{annotation.__name__} does not declare {sorted(undeclared)}"
+    annotation.model_validate(payload)
+    for key, value in payload.items():
+        nested = fields[key].annotation
+        if typing.get_origin(nested) is list and issubclass(typing.get_args(nested)[0], BaseModel):
+            assert_matches(nested, value)
+
+def role_for(path: str) -> str:
+    if path.startswith("/api/admin"):
+        return "admin"
+    if path.startswith("/api/security"):
+        return "security"
+    return "resident"
+
+async def test_responses_match_their_models(client, db, headers, users):
+    admin, resident, security = headers["admin"], headers["resident"], headers["security"]
+    response = await client.post(
+        "/api/admin/facilities", json={"name": "Gym", "available_slots": ["06:00-07:00"]}, headers=admin
+    )
+    facility_id = response.json()["facility_id"]
+    await client.post("/api/bookings", json={"facility_id": facility_id, "slot": "06:00-07:00"}, headers=resident)
+    for title in ("Leak", "Noise"):
+        response = await client.post("/api/complaints", json={"title": title, "description": "Tower A"}, headers=resident)
+    await client.post(f"/api/admin/complaints/{response.json()['complaint_id']}/resolve", headers=admin)
+    visitor = {"name": "Courier", "purpose": "Delivery", "resident_id": str(users["resident"]["_id"])}
+    for _ in range(2):
+        response = await client.post("/api/security/visitors", json=visitor, headers=security)
+    await client.post(f"/api/visitors/{response.json()['visitor_id']}/approve", headers=resident)
+    # A legacy visitor nobody can be attributed to
+    db["visitors"].insert_one({
+        "name": "Unknown", "purpose": "Legacy", "resident_id": None, "flat": None, "status": "exited",
+        "created_at": main.datetime.utcnow(), "society_id": main.DEFAULT_SOCIETY_ID,
+    })
+
+    routes = [
+        route for route in main.app.routes
+        if isinstance(route, APIRoute) and route.response_model is not None and "GET" in route.methods
+    ]
+    assert routes
+    for route in routes:
+        response = await client.get(route.path, headers=headers[role_for(route.path)])
+        assert response.status_code == 200, route.path
+        assert_matches(route.response_model, response.json())
@@ -0,0 +1,60 @@
+import pytest
+
+import main
+
+pytestmark = pytest.mark.anyio
+
+async def test_stream_ticket_is_single_purpose(client, headers, users):
+    response = await client.post("/api/visitors/events/ticket", headers=headers["security"])
+    assert response.status_code == 200
+    ticket = response.json()["ticket"]
+
+    user = await main.authenticate(ticket, purpose=main.VISITOR_EVENT_TICKET_PURPOSE)
+    assert user["_id"] == users["security"]["_id"]
+    # A ticket is not a bearer token...
+    assert (await client.get("/me", headers={"Authorization": f"Bearer {ticket}"})).status_code == 401
+    # ...and a bearer token cannot open the stream
+    bearer = headers["security"]["Authorization"].split()[1]
+    assert (await client.get("/api/visitors/events", params={"ticket": bearer})).status_code == 401
+
+def test_broker_skips_replayed_events_and_waits_on_gaps():
+    broker = main.MongoEventBroker("visitor_events", "counters", 1024)
+    # seq 2 was inserted before seq 1 by another worker
+    assert broker._claim(2) and broker._watermark == 0
+    assert broker._claim(1) and broker._watermark == 2
+    # A reopened tail replays from the watermark; duplicates are dropped
+    assert not broker._claim(2)
+    assert broker._claim(4) and not broker._claim(4)
+    assert broker._watermark == 2
+
+def test_broker_gives_up_on_a_gap_that_never_fills(monkeypatch):
+    monkeypatch.setattr(main, "VISITOR_EVENT_MAX_GAP", 3)
+    broker = main.MongoEventBroker("visitor_events", "counters", 1024)
+    for seq in (2, 3, 4, 5):
+        broker._claim(seq)
+    assert broker._watermark == 5 and not broker._seen
+
+async def test_residents_only_receive_their_own_societys_visitors():
+    bus = main.VisitorEventBus(main.LocalEventBroker(), queue_size=10)
+    await bus.start()
+    resident_id, neighbour_id = "a" * 24, "b" * 24
+    main.current_society.set("north")
+    resident = bus.subscribe({"_id": resident_id, "role": "resident"})
+    guard = bus.subscribe({"_id": "c" * 24, "role": "security"})
+    main.current_society.set("south")
+    other_guard = bus.subscribe({"_id": "d" * 24, "role": "security"})
+
+    await bus.publish("visitor.created", {"name": "Courier", "resident_id": resident_id, "society_id": "north"})
+    await bus.publish("visitor.created", {"name": "Plumber", "resident_id": neighbour_id, "society_id": "north"})
+    # Same resident id in another society must never cross over
+    await bus.publish("visitor.created", {"name": "Cab", "resident_id": resident_id, "society_id": "south"})
+
+    def received(subscription):
+        names = []
+        while not subscription.queue.empty():
+            names.append(subscription.queue.get_nowait()["visitor"]["name"])
+        return names
+
+    assert received(resident) == ["Courier"]
+    assert received(guard) == ["Courier", "Plumber"]
+    assert received(other_guard) == ["Cab"]